@@ -5,16 +5,24 @@ Wraps existing Notion automation code into REST API endpoints
 
 import os
 import sys
-from pathlib import Path
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from backend_app import (
-    check_tokens, upload_video,
     get_pending_projects, get_project_details, get_project_tasks,
-    search_youtube_video, get_video_transcript, download_clip)
+    fetch_project_transcript, prefetch_transcripts,
+    submit_clip_job, get_clip_job, resume_clip_jobs, get_pipeline_stats, conditional,
+    timestamp_to_seconds)
 
 API_BASE_URL = '/api/v1'
 SERVER_PORT = 5000
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+
+# "development": Flask debug server with reloader; "production": multi-threaded WSGI server (waitress)
+SERVER_MODE = os.getenv("SERVER_MODE", "development").lower()
+
+# Requests handled at once in production mode. Handlers mostly wait on Notion,
+# YouTube and Canva, so this is sized for I/O, well above the CPU count
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "16"))
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
@@ -27,6 +35,7 @@ def health_check():
 
 
 @app.route(API_BASE_URL + '/projects', methods=['GET'])
+@conditional
 def get_projects():
     """
     Get pending projects (with status "Not started") from the Notion database
@@ -39,6 +48,9 @@ def get_projects():
     try:
         # Get pending pages (status "Not started") from the source database
         projects = get_pending_projects()
+
+        # Warm the transcript cache for the listed projects in the background
+        prefetch_transcripts(projects)
         
         return jsonify({
             "success": True,
@@ -79,6 +91,7 @@ def get_project_detail(project_id):
 
 
 @app.route(API_BASE_URL + '/projects/<project_id>/tasks', methods=['GET'])
+@conditional
 def get_tasks(project_id):
     """
     Get detailed tasks of a specific project including all headings
@@ -124,6 +137,7 @@ def get_tasks(project_id):
 
 
 @app.route(API_BASE_URL + '/projects/<project_id>/transcript', methods=['GET'])
+@conditional
 def get_project_transcript(project_id):
     """
     Get detailed transcript for a specific project
@@ -133,18 +147,14 @@ def get_project_transcript(project_id):
     print("=" * 40)
 
     try:
-        project_details = get_project_details(project_id)
-        search_query = f"{project_details["episode"]} {project_details["podcast_show"]}"
-        video_id = search_youtube_video(search_query)
-
-        # Extract Transcript of video
-        transcript = get_video_transcript(video_id)
+        # Resolve video and fetch transcript (served from the transcript cache when warm)
+        result = fetch_project_transcript(project_id)
 
         return jsonify({
             "success": True,
             "project_id": project_id,
-            "video_id": video_id,
-            "transcript": transcript
+            "video_id": result["video_id"],
+            "transcript": result["transcript"]
         })
 
     except Exception as e:
@@ -157,8 +167,9 @@ def get_project_transcript(project_id):
 @app.route(API_BASE_URL + '/create', methods=['POST'])
 def create_snippet():
     """
-    Create a new snippet/clip
+    Queue a new snippet/clip job
     Expects JSON body with: title, video_id, start, end
+    Returns: Job ID to poll at /jobs/<job_id>
     """
     print("=" * 40)
     print("/create")
@@ -184,111 +195,39 @@ def create_snippet():
         start = data['start']
         end = data['end']
 
-        print(f"Creating snippet:")
-        print(f"  Title: {title}")
-        print(f"  Video ID: {video_id}")
-        print(f"  Start: {start}")
-        print(f"  End: {end}")
-
-        # Step 1: Check Canva tokens
-        print("=" * 30)
-        print("STEP 1: Validate Canva Authentication")
-        print("=" * 30)
-        if not check_tokens():
-            print("\n✗ Token validation failed. Please authenticate with Canva first.")
+        # Reject malformed timestamps here rather than failing inside the job pipeline
+        try:
+            start_sec = timestamp_to_seconds(start)
+            end_sec = timestamp_to_seconds(end)
+        except (ValueError, AttributeError):
             return jsonify({
                 "success": False,
-                "error": "Canva authentication failed. Please authenticate first."
-            }), 401
-
-        # Step 2: Create content directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        content_dir = os.path.join(script_dir, 'content')
-        os.makedirs(content_dir, exist_ok=True)
-
-        # Step 3: Download video
-        print("\n" + "=" * 30)
-        print("STEP 2: Downloading YouTube Clip")
-        print("=" * 30)
-
-        # Construct YouTube URL from video_id
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-
-        # Change to content directory for download
-        original_dir = os.getcwd()
-        os.chdir(content_dir)
+                "error": f"Invalid start/end timestamp: {start!r}, {end!r}. Use MM:SS or HH:MM:SS"
+            }), 400
 
-        try:
-            success = download_clip(video_url, start, end, title)
-
-            if not success:
-                print("\n✗ Video download failed")
-                os.chdir(original_dir)
-                return jsonify({
-                    "success": False,
-                    "error": "Video download failed"
-                }), 500
-
-            # Find the downloaded file
-            # It should be the most recently created .mp4 file
-            mp4_files = sorted(
-                Path(content_dir).glob('*.mp4'),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True
-            )
-
-            if not mp4_files:
-                print("\n✗ No video file found after download")
-                os.chdir(original_dir)
-                return jsonify({
-                    "success": False,
-                    "error": "No video file found after download"
-                }), 500
-
-            video_path = str(mp4_files[0])
-            print(f"\n✓ Video downloaded: {os.path.basename(video_path)}")
-
-        finally:
-            os.chdir(original_dir)
-
-        # Step 4: Upload to Canva
-        print("\n" + "=" * 30)
-        print("STEP 3: Uploading to Canva")
-        print("=" * 30)
-
-        asset_id = upload_video(video_path)
-
-        if not asset_id:
-            print("\n✗ Canva upload failed")
-            print(f"   Video file saved at: {video_path}")
+        if start_sec >= end_sec:
             return jsonify({
                 "success": False,
-                "error": "Canva upload failed",
-                "video_path": video_path
-            }), 500
-
-        # Step 5: Delete local file
-        print("\n" + "=" * 30)
-        print("STEP 4: Cleaning Up")
-        print("=" * 30)
+                "error": f"Start time {start} must be before end time {end}"
+            }), 400
 
-        try:
-            os.remove(video_path)
-            print(f"✓ Deleted local file: {os.path.basename(video_path)}")
-        except Exception as e:
-            print(f"⚠  Warning: Could not delete local file: {e}")
-            print(f"   Please manually delete: {video_path}")
+        print(f"Creating snippet:")
+        print(f"  Title: {title}")
+        print(f"  Video ID: {video_id}")
+        print(f"  Start: {start}")
+        print(f"  End: {end}")
 
-        # Success!
-        print("\n" + "=" * 30)
-        print("✓ COMPLETE!")
-        print("=" * 30)
+        # Download, upload and Canva polling run on the clip job pipeline
+        job = submit_clip_job(title, video_id, start, end)
 
         return jsonify({
             "success": True,
-            "message": "Snippet created successfully",
-            "canva_asset_id": asset_id
-        })
+            "message": "Snippet job queued",
+            "job_id": job["id"],
+            "status": job["status"],
+            "canva_asset_id": job["canva_asset_id"],
+            "status_url": f"{API_BASE_URL}/jobs/{job['id']}"
+        }), 202
 
     except Exception as e:
         return jsonify({
@@ -297,9 +236,70 @@ def create_snippet():
         }), 500
 
 
+@app.route(API_BASE_URL + '/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get status of a clip job queued by /create
+    Returns: Job status, current stage and, once finished, the Canva asset ID or error
+    """
+    job = get_clip_job(job_id)
+
+    if not job:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "job": job
+    })
+
+
+@app.route(API_BASE_URL + '/pipeline', methods=['GET'])
+def get_pipeline():
+    """
+    Get the state of the clip job pipeline
+    Returns: Queue depth and worker utilization of the download, upload and poll stages
+    """
+    return jsonify({
+        "success": True,
+        "stages": get_pipeline_stats()
+    })
+
+
+def resume_jobs():
+    """Resume clip jobs interrupted by the last shutdown"""
+    resumed = resume_clip_jobs()
+    if resumed:
+        print(f"Resumed {resumed} interrupted clip job(s)")
+
+
+def serve_production():
+    """Serve with waitress: a pool of SERVER_THREADS threads, so slow requests don't hold up the rest"""
+    resume_jobs()
+
+    try:
+        from waitress import serve
+    except ImportError:
+        print("⚠ waitress is not installed (pip install waitress), using Flask's threaded server")
+        app.run(host=SERVER_HOST, port=SERVER_PORT, threaded=True)
+        return
+
+    print(f"Serving with waitress ({SERVER_THREADS} threads)")
+    serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS)
+
+
 if __name__ == '__main__':
     print("=" * 60)
-    print(f"\nStarting Flask server on http://localhost:{SERVER_PORT}")
+    print(f"\nStarting Flask server on http://localhost:{SERVER_PORT} ({SERVER_MODE} mode)")
     print("=" * 60)
-    
-    app.run(debug=True, port=SERVER_PORT)
\ No newline at end of file
+
+    if SERVER_MODE == "production":
+        serve_production()
+    else:
+        # Resume jobs only in the serving process, not in the debug reloader's watcher
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            resume_jobs()
+
+        app.run(debug=True, host=SERVER_HOST, port=SERVER_PORT)
\ No newline at end of file
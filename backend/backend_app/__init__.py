@@ -1,9 +1,17 @@
 from .canva_auth_utils import check_tokens
-from .canva_upload_video import upload_video
+from .canva_upload_video import upload_video, upload_videos
+from .clip_jobs import submit_clip_job, get_clip_job, resume_clip_jobs, get_pipeline_stats
+from .conditional_response import conditional
 from .notion_parser import get_pending_projects, get_project_details, get_project_tasks
-from .youtube_util import search_youtube_video, get_video_transcript, download_clip
+from .transcript_cache import fetch_project_transcript, prefetch_transcripts
+from .youtube_util import (search_youtube_video, get_video_transcript, download_clip, download_clips, stream_clip,
+                           timestamp_to_seconds)
 
 __all__ = [
-    'check_tokens', 'upload_video',
+    'check_tokens', 'upload_video', 'upload_videos',
+    'submit_clip_job', 'get_clip_job', 'resume_clip_jobs', 'get_pipeline_stats',
+    'conditional',
     'get_pending_projects', 'get_project_details', 'get_project_tasks',
-    'search_youtube_video', 'get_video_transcript', 'download_clip',]
\ No newline at end of file
+    'fetch_project_transcript', 'prefetch_transcripts',
+    'search_youtube_video', 'get_video_transcript', 'download_clip', 'download_clips', 'stream_clip',
+    'timestamp_to_seconds',]
\ No newline at end of file
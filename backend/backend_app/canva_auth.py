@@ -5,6 +5,7 @@ import secrets
 import requests
 from flask import Flask, request, redirect
 from dotenv import load_dotenv
+from .canva_token_manager import save_tokens
 
 # Load environment variables
 load_dotenv()
@@ -109,9 +110,7 @@ def callback():
         script_dir = os.path.dirname(os.path.abspath(__file__))
         tokens_file = os.path.join(script_dir, '.tokens')
         
-        with open(tokens_file, 'w') as f:
-            f.write(f"ACCESS_TOKEN={access_token}\n")
-            f.write(f"REFRESH_TOKEN={refresh_token}\n")
+        save_tokens(tokens_file, access_token, refresh_token, expires_in)
         
         print(f"💾 Tokens saved to: {tokens_file}")
         
@@ -0,0 +1,199 @@
+"""
+Canva Client
+Shared Canva API client: a pooled keep-alive session, the access token held in
+memory (reloaded when .tokens changes, refreshed before it expires), cached
+token validation and per-endpoint rate-limit budgets
+"""
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+from .canva_token_manager import TOKENS_FILE, CanvaTokenManager, CanvaTokenExpired
+
+API_BASE = "https://api.canva.com/rest/v1"
+
+# Maximum number of pooled keep-alive connections to Canva
+CANVA_POOL_SIZE = int(os.getenv("CANVA_POOL_SIZE", "10"))
+
+# A successful token validation is trusted for this many seconds (and never past the token's expiry)
+CANVA_TOKEN_CHECK_TTL = int(os.getenv("CANVA_TOKEN_CHECK_TTL", "600"))
+
+# Request budgets (requests per minute), matching Canva's per-user rate limits
+CANVA_UPLOAD_RATE = int(os.getenv("CANVA_UPLOAD_RATE", "30"))    # POST /asset-uploads
+CANVA_STATUS_RATE = int(os.getenv("CANVA_STATUS_RATE", "180"))   # GET /asset-uploads/{job_id}
+CANVA_API_RATE = int(os.getenv("CANVA_API_RATE", "100"))         # everything else
+
+# Seconds to wait after a 429 when Canva sends no Retry-After
+RATE_LIMITED_DELAY = 10
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Blocking rate limiter allowing at most rate_per_minute requests in any minute.
+
+    Half the budget may be spent in a burst; the rest is refilled evenly over the minute.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = max(1, rate_per_minute // 2)
+        self.refill_per_second = max(rate_per_minute - self.capacity, 1) / 60
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one request from the budget, waiting until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+class CanvaClient:
+    """Canva REST API client shared by all requests of the process."""
+
+    def __init__(self, tokens_file: str = TOKENS_FILE):
+        self.tokens_file = tokens_file
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=CANVA_POOL_SIZE)
+        self.session.mount("https://", adapter)
+
+        self.token_manager = CanvaTokenManager(tokens_file)
+        self.rate_limits = {
+            'upload': TokenBucket(CANVA_UPLOAD_RATE),
+            'status': TokenBucket(CANVA_STATUS_RATE),
+            'api': TokenBucket(CANVA_API_RATE),
+        }
+        self._lock = threading.Lock()
+        # Token that last passed validation, and until when that result is trusted
+        self._validated_token = None
+        self._validated_until = 0.0
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """
+        The current access token, or None if .tokens is missing or has none.
+
+        Raises:
+            CanvaTokenExpired: If the token has expired and could not be refreshed
+        """
+        return self.token_manager.access_token
+
+    def check_token(self) -> bool:
+        """
+        Check that the access token is accepted by Canva.
+
+        A successful check is cached for CANVA_TOKEN_CHECK_TTL seconds (at most
+        until the token expires), or until the token changes or a request is
+        rejected with 401.
+        """
+        if not os.path.exists(self.tokens_file):
+            print("✗ No .tokens file found in backend_app/")
+            print("   Please run make canva_auth first!")
+            return False
+
+        try:
+            access_token = self.access_token
+        except CanvaTokenExpired as e:
+            print(f"✗ {e}")
+            return False
+        if not access_token:
+            print("✗ No valid access token found in .tokens file")
+            return False
+
+        with self._lock:
+            if access_token == self._validated_token and time.time() < self._validated_until:
+                return True
+
+        # Validate token by making a simple API call to /users/me endpoint
+        print("= Validating Canva access token...")
+        try:
+            response = self.get("/users/me", timeout=10)
+        except Exception as e:
+            print(f"✗ Error validating token: {e}")
+            return False
+
+        if response.status_code != 200:
+            print(f"✗ Token validation failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+
+        user_id = response.json().get('team_user', {}).get('user_id')
+        if not user_id:
+            print(f"✗ Invalid response format from API")
+            return False
+
+        print(f"✓ Token is valid! (User ID: {user_id})")
+        validated_until = time.time() + CANVA_TOKEN_CHECK_TTL
+        expires_at = self.token_manager.expires_at
+        with self._lock:
+            self._validated_token = access_token
+            self._validated_until = min(validated_until, expires_at) if expires_at else validated_until
+        return True
+
+    def request(self, method: str, path: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """
+        Send an authenticated request to the Canva API (path relative to API_BASE).
+
+        Requests wait for the rate-limit budget of their endpoint. On a 401 the
+        token is refreshed, and on a 429 Retry-After is honoured; in both cases
+        requests without a body stream are retried once.
+        """
+        response = self.send(method, path, headers, **kwargs)
+
+        if response.status_code == 429 and 'data' not in kwargs:
+            delay = response.headers.get('Retry-After')
+            time.sleep(int(delay) if delay and delay.isdigit() else RATE_LIMITED_DELAY)
+            return self.send(method, path, headers, **kwargs)
+
+        if response.status_code != 401:
+            return response
+
+        # Token revoked or expired: validate again next time
+        with self._lock:
+            self._validated_token = None
+
+        # A file or iterator body was consumed by the first attempt and cannot be replayed
+        if 'data' in kwargs or not self.token_manager.refresh(force=True):
+            return response
+        return self.send(method, path, headers, **kwargs)
+
+    def send(self, method: str, path: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """Send one request with the current access token."""
+        self.rate_limit(method, path).acquire()
+        headers = {'Authorization': f'Bearer {self.access_token}', **(headers or {})}
+        return self.session.request(method, f"{API_BASE}{path}", headers=headers, **kwargs)
+
+    def rate_limit(self, method: str, path: str) -> TokenBucket:
+        """The rate-limit budget a request counts against."""
+        if path.startswith('/asset-uploads'):
+            return self.rate_limits['upload' if method == 'POST' else 'status']
+        return self.rate_limits['api']
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+
+def get_canva_client() -> CanvaClient:
+    """Get the process-wide Canva client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CanvaClient()
+            _client.token_manager.start_refresher()
+        return _client
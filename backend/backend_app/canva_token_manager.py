@@ -0,0 +1,228 @@
+"""
+Canva Token Manager
+Keeps the Canva OAuth tokens in .tokens fresh: tracks the access token expiry,
+refreshes it with the refresh-token grant before it runs out (in the background
+and on demand) and writes the new tokens atomically
+"""
+
+import os
+import time
+import fcntl
+import base64
+import tempfile
+import threading
+import requests
+from contextlib import contextmanager
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKENS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tokens')
+TOKEN_URL = "https://api.canva.com/rest/v1/oauth/token"
+
+CLIENT_ID = os.getenv('CANVA_CLIENT_ID')
+CLIENT_SECRET = os.getenv('CANVA_CLIENT_SECRET')
+
+# Refresh the access token when it has less than this many seconds left
+CANVA_TOKEN_REFRESH_MARGIN = int(os.getenv("CANVA_TOKEN_REFRESH_MARGIN", "600"))
+
+# Seconds to wait before retrying a failed refresh
+REFRESH_RETRY_DELAY = 60
+
+
+class CanvaTokenExpired(Exception):
+    """The access token has expired and could not be refreshed."""
+
+
+class CanvaTokenManager:
+    """Reads, refreshes and saves the tokens in one .tokens file."""
+
+    def __init__(self, tokens_file: str = TOKENS_FILE):
+        self.tokens_file = tokens_file
+        self._lock = threading.Lock()
+        # Held for the whole refresh, so concurrent callers wait for one refresh instead of racing
+        self._refresh_lock = threading.Lock()
+        self._tokens = {}
+        self._tokens_version = None
+        self._refresher_started = False
+        # Unix time of the last failed refresh (0 after a successful one)
+        self._refresh_failed_at = 0.0
+
+    def tokens(self) -> Dict[str, str]:
+        """The entries of .tokens, re-read only when the file has changed."""
+        with self._lock:
+            try:
+                stat = os.stat(self.tokens_file)
+                # The inode changes on every atomic save, even within the mtime resolution
+                version = (stat.st_mtime_ns, stat.st_ino)
+            except FileNotFoundError:
+                self._tokens, self._tokens_version = {}, None
+                return {}
+
+            if version != self._tokens_version:
+                with open(self.tokens_file, 'r') as f:
+                    self._tokens = dict(
+                        line.strip().split('=', 1) for line in f if '=' in line
+                    )
+                self._tokens_version = version
+
+            return dict(self._tokens)
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """
+        The current access token, refreshed first if it is about to expire.
+
+        After a failed refresh the still-valid token keeps being served and the
+        refresh is retried at most every REFRESH_RETRY_DELAY seconds, so a slow
+        or failing token endpoint does not queue every request on the refresh lock.
+
+        Raises:
+            CanvaTokenExpired: If the token has expired and could not be refreshed
+        """
+        if self.expires_within(CANVA_TOKEN_REFRESH_MARGIN) and not self.backing_off():
+            self.refresh()
+        if self.expires_within(0):
+            raise CanvaTokenExpired("Canva access token expired and could not be refreshed")
+        return self.tokens().get('ACCESS_TOKEN')
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        """Unix time the access token expires, or None if unknown (tokens saved before expiry was stored)."""
+        expires_at = self.tokens().get('EXPIRES_AT')
+        return float(expires_at) if expires_at else None
+
+    def expires_within(self, seconds: float) -> bool:
+        """Check whether the access token expires within the given number of seconds."""
+        expires_at = self.expires_at
+        return expires_at is not None and expires_at - time.time() < seconds
+
+    def backing_off(self) -> bool:
+        """Check whether a refresh failed less than REFRESH_RETRY_DELAY seconds ago."""
+        return time.time() - self._refresh_failed_at < REFRESH_RETRY_DELAY
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Exchange the refresh token for a new access token.
+
+        Refreshes are serialized across threads and, with a lock on
+        .tokens.lock, across processes (the server, video_design.py): Canva
+        rotates refresh tokens, so a second refresh with the same refresh token
+        would fail and break the token chain. A caller that waited on another
+        refresh reuses its result unless force is set, and within
+        REFRESH_RETRY_DELAY of a failed refresh no new attempt is made unless
+        force is set.
+
+        Args:
+            force: Refresh even if the current token is not about to expire (e.g. after a 401)
+
+        Returns:
+            True if a usable access token is available afterwards
+        """
+        stale_token = self.tokens().get('ACCESS_TOKEN')
+
+        with self._refresh_lock, file_lock(self.tokens_file + '.lock'):
+            # Re-read: another process may have rotated the tokens while we waited
+            tokens = self.tokens()
+            refreshed_meanwhile = tokens.get('ACCESS_TOKEN') != stale_token
+            if refreshed_meanwhile or (not force and not self.expires_within(CANVA_TOKEN_REFRESH_MARGIN)):
+                return bool(tokens.get('ACCESS_TOKEN'))
+            if not force and self.backing_off():
+                return bool(tokens.get('ACCESS_TOKEN')) and not self.expires_within(0)
+
+            refreshed = self.request_tokens(tokens)
+            self._refresh_failed_at = 0.0 if refreshed else time.time()
+            return refreshed
+
+    def request_tokens(self, tokens: Dict[str, str]) -> bool:
+        """Run the refresh-token grant and save the new tokens (caller holds the refresh locks)."""
+        refresh_token = tokens.get('REFRESH_TOKEN')
+        if not refresh_token or refresh_token == 'None':
+            print("✗ No Canva refresh token. Please run make canva_auth again")
+            return False
+
+        print("🔄 Refreshing Canva access token...")
+        auth_b64 = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
+        try:
+            response = requests.post(
+                TOKEN_URL,
+                headers={
+                    'Authorization': f'Basic {auth_b64}',
+                    'Content-Type': 'application/x-www-form-urlencoded'
+                },
+                data={'grant_type': 'refresh_token', 'refresh_token': refresh_token},
+                timeout=30
+            )
+        except Exception as e:
+            print(f"✗ Error refreshing Canva token: {e}")
+            return False
+
+        if response.status_code != 200:
+            print(f"✗ Canva token refresh failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+
+        token_data = response.json()
+        save_tokens(self.tokens_file, token_data['access_token'],
+                    # Canva rotates refresh tokens; keep the old one if none is returned
+                    token_data.get('refresh_token') or refresh_token,
+                    token_data.get('expires_in'))
+        print(f"✓ Canva access token refreshed (expires in {token_data.get('expires_in')} seconds)")
+        return True
+
+    def start_refresher(self):
+        """Start the background thread that refreshes the token before it expires (once)."""
+        with self._lock:
+            if self._refresher_started:
+                return
+            self._refresher_started = True
+
+        threading.Thread(target=self.refresh_loop, name='canva-token-refresher', daemon=True).start()
+
+    def refresh_loop(self):
+        """Sleep until the token is about to expire, refresh it, repeat."""
+        while True:
+            expires_at = self.expires_at
+            if expires_at is None:
+                # No expiry known yet (not authenticated, or tokens from an older login)
+                time.sleep(REFRESH_RETRY_DELAY)
+                continue
+
+            time.sleep(max(0, expires_at - CANVA_TOKEN_REFRESH_MARGIN - time.time()))
+            if not self.refresh():
+                time.sleep(REFRESH_RETRY_DELAY)
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Hold an exclusive flock on lock_path (created if missing) for the duration of the block."""
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def save_tokens(tokens_file: str, access_token: str, refresh_token: Optional[str], expires_in: Optional[int]):
+    """
+    Write tokens to the .tokens file atomically.
+
+    The tokens are written to a temporary file next to tokens_file and moved
+    over it, so readers never see a partially written file.
+    """
+    lines = [f"ACCESS_TOKEN={access_token}\n", f"REFRESH_TOKEN={refresh_token}\n"]
+    if expires_in:
+        lines.append(f"EXPIRES_AT={int(time.time() + expires_in)}\n")
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.tokens-', dir=os.path.dirname(tokens_file))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, tokens_file)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
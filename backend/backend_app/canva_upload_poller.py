@@ -0,0 +1,153 @@
+"""
+Canva Upload Poller
+Adaptive polling of Canva asset upload jobs. Status checks for all jobs are
+multiplexed on one background event loop, start with short intervals and back
+off exponentially with jitter. The first check is scheduled from processing
+times learned from earlier uploads of similar size.
+"""
+
+import time
+import random
+import asyncio
+import threading
+import requests
+from concurrent.futures import Future
+from typing import Dict, Optional
+from .canva_client import get_canva_client
+
+# Polling schedule (seconds)
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 10
+POLL_BACKOFF = 1.6
+POLL_JITTER = 0.2
+POLL_TIMEOUT = 300
+
+# Status check responses that are retried on the polling schedule instead of failing the job
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Weight of the newest observation in the learned processing rate
+RATE_SMOOTHING = 0.3
+
+# Learned Canva processing time, in seconds per MB of upload (None until the first upload finishes)
+_seconds_per_mb: Optional[float] = None
+_rate_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+class UploadPollError(Exception):
+    """Raised when the upload job status cannot be retrieved."""
+
+
+def submit_upload_job(job_id: str, file_size: Optional[int] = None,
+                      timeout: float = POLL_TIMEOUT) -> Future:
+    """
+    Start polling a Canva upload job without waiting for it.
+
+    Args:
+        job_id: Canva upload job ID
+        file_size: Size of the uploaded file in bytes, used to predict processing time
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        A Future resolving to the finished job ("status" is "success" or
+        "failed"), or to None on timeout. It raises UploadPollError if a status
+        check fails with a non-transient error (429, 5xx and connection errors
+        are retried until the timeout)
+    """
+    return asyncio.run_coroutine_threadsafe(
+        poll_upload_job(job_id, file_size, timeout), get_loop())
+
+
+async def poll_upload_job(job_id: str, file_size: Optional[int] = None,
+                          timeout: float = POLL_TIMEOUT) -> Optional[Dict]:
+    """Poll a Canva upload job on the event loop until it finishes (see submit_upload_job)."""
+    started = time.monotonic()
+    interval = POLL_MIN_INTERVAL
+    delay = first_poll_delay(file_size)
+    checks = 0
+
+    while True:
+        await asyncio.sleep(delay)
+        checks += 1
+
+        try:
+            response = await asyncio.to_thread(fetch_upload_job, job_id)
+        except requests.RequestException as e:
+            response, status = None, f"unavailable: {e}"
+        else:
+            status = None if response.status_code == 200 else f"unavailable: HTTP {response.status_code}"
+
+        if response is not None and response.status_code not in (200, *TRANSIENT_STATUS_CODES):
+            raise UploadPollError(f"Error checking upload status: {response.status_code} {response.text}")
+
+        elapsed = time.monotonic() - started
+
+        # Rate limited, server errors and connection errors count as "not ready yet"
+        if status is None:
+            job = response.json()['job']
+            status = job['status']
+            if status in ('success', 'failed'):
+                print(f"   Job {job_id} finished after {elapsed:.1f}s ({checks} status checks)")
+                if status == 'success':
+                    record_processing_time(file_size, elapsed)
+                return job
+
+        if elapsed >= timeout:
+            return None
+
+        print(f"   Processing... ({elapsed:.0f}s, status: {status})")
+        interval = min(POLL_MAX_INTERVAL, interval * POLL_BACKOFF)
+        delay = min(jittered(interval), timeout - elapsed)
+
+
+"""
+PRIVATE METHODS
+"""
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared polling event loop, starting its thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='canva-upload-poller', daemon=True).start()
+        return _loop
+
+
+def fetch_upload_job(job_id: str) -> requests.Response:
+    """Get the status of an upload job."""
+    return get_canva_client().get(f"/asset-uploads/{job_id}", timeout=30)
+
+
+def first_poll_delay(file_size: Optional[int]) -> float:
+    """Delay before the first check: just under the predicted processing time, if known."""
+    with _rate_lock:
+        seconds_per_mb = _seconds_per_mb
+
+    if seconds_per_mb is None or not file_size:
+        return POLL_MIN_INTERVAL
+
+    expected = seconds_per_mb * file_size / (1024 * 1024)
+    return min(POLL_MAX_INTERVAL, max(POLL_MIN_INTERVAL, 0.8 * expected))
+
+
+def record_processing_time(file_size: Optional[int], elapsed: float):
+    """Update the learned processing rate with a finished upload."""
+    global _seconds_per_mb
+
+    if not file_size:
+        return
+
+    observed = elapsed / max(file_size / (1024 * 1024), 0.1)
+    with _rate_lock:
+        if _seconds_per_mb is None:
+            _seconds_per_mb = observed
+        else:
+            _seconds_per_mb = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * _seconds_per_mb
+
+
+def jittered(interval: float) -> float:
+    """Spread an interval by +/- POLL_JITTER so concurrent jobs do not poll in lockstep."""
+    return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
@@ -1,18 +1,121 @@
 import os
-import requests
-import time
-from .canva_auth_utils import load_tokens
+import base64
+import hashlib
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from . import clip_job_store
+from .canva_client import get_canva_client
+from .canva_upload_poller import POLL_TIMEOUT, UploadPollError, submit_upload_job
 
 
-API_BASE = "https://api.canva.com/rest/v1"
 FOLDER_ID = "FAF5Hqk8gT8"
 
+# Number of files sent to Canva at once by upload_videos (requests also stay within the client's rate limits)
+CANVA_UPLOAD_WORKERS = int(os.getenv("CANVA_UPLOAD_WORKERS", "4"))
 
-def upload_video(video_path):
-    """Upload video file to Canva"""
 
-    access_token = load_tokens()
+# Status codes with which the upload endpoint rejects a chunked (streamed) body
+STREAM_REJECTED_STATUSES = (400, 411, 413, 501)
 
+
+class StreamingUploadRejected(Exception):
+    """Raised when Canva does not accept a chunked upload body."""
+
+
+def upload_video(video_path, sha256=None):
+    """Upload video file to Canva
+
+    If a byte-identical file was uploaded before and its asset still exists,
+    the upload is skipped and the existing asset ID is returned.
+
+    Args:
+        video_path: Path of the video file
+        sha256: SHA-256 of the file, if already computed (otherwise the file is hashed
+            here, in one read before the upload)
+    """
+    video_path = os.path.expanduser(video_path)
+    if not os.path.exists(video_path):
+        print(f"❌ Video file not found: {video_path}")
+        return None
+
+    sha256 = sha256 or file_sha256(video_path)
+    asset_id = find_uploaded_asset(sha256)
+    if asset_id:
+        return asset_id
+
+    upload_job_id = start_video_upload(video_path)
+    if not upload_job_id:
+        return None
+
+    asset_id = wait_for_asset(upload_job_id, os.path.getsize(video_path))
+    index_uploaded_asset(sha256, asset_id)
+    return asset_id
+
+
+def upload_videos(video_paths, max_workers=CANVA_UPLOAD_WORKERS):
+    """Upload many video files to Canva concurrently
+
+    Files are sent on up to max_workers threads, within the Canva client's
+    rate-limit budgets. Every upload job is polled on the shared poller as
+    soon as it starts, so processing overlaps with the remaining uploads.
+    Files already uploaded with identical bytes are skipped.
+
+    Args:
+        video_paths: Paths of the video files
+        max_workers: Maximum number of files sent at once
+
+    Returns:
+        List with one result per path, in order:
+        {"path": str, "asset_id": str | None, "success": bool, "error": str | None}
+    """
+    def start(video_path):
+        """Returns (sha256, existing asset ID, poll future)"""
+        video_path = os.path.expanduser(video_path)
+        sha256 = file_sha256(video_path)
+        asset_id = find_uploaded_asset(sha256)
+        if asset_id:
+            return sha256, asset_id, None
+
+        upload_job_id = start_video_upload(video_path)
+        if not upload_job_id:
+            return sha256, None, None
+        return sha256, None, submit_upload_job(upload_job_id, os.path.getsize(video_path))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='canva-upload') as executor:
+        started = [executor.submit(start, video_path) for video_path in video_paths]
+
+        for video_path, future in zip(video_paths, started):
+            try:
+                sha256, asset_id, poll = future.result()
+                if asset_id:
+                    error = None
+                elif poll:
+                    asset_id, error = finish_upload(poll)
+                    index_uploaded_asset(sha256, asset_id)
+                else:
+                    error = "Upload request failed"
+            except Exception as e:
+                asset_id, error = None, str(e)
+
+            results.append({
+                "path": video_path,
+                "asset_id": asset_id,
+                "success": asset_id is not None,
+                "error": error,
+            })
+
+    succeeded = sum(result["success"] for result in results)
+    print(f"\n✓ Uploaded {succeeded}/{len(results)} videos to Canva")
+    return results
+
+
+def start_video_upload(video_path):
+    """Send a video file to Canva's asset-uploads endpoint
+
+    Returns:
+        The Canva upload job ID, or None if the upload request failed
+    """
     # Expand path if it contains ~
     video_path = os.path.expanduser(video_path)
 
@@ -26,24 +129,15 @@ def upload_video(video_path):
     file_size = os.path.getsize(video_path)
     print(f"   File size: {file_size / (1024*1024):.2f} MB")
     
-    # Get filename and encode it in base64
-    import base64
-    filename = os.path.basename(video_path)
-    name_base64 = base64.b64encode(filename.encode('utf-8')).decode('utf-8')
-    
     # Step 1: Upload the video file directly with metadata in header
     print(f"⏫ Uploading file to Canva...")
     
-    upload_headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/octet-stream',
-        'Asset-Upload-Metadata': f'{{"name_base64": "{name_base64}"}}'
-    }
+    upload_headers = asset_upload_headers(os.path.basename(video_path))
     
     # Read and upload file
     with open(video_path, 'rb') as video_file:
-        response = requests.post(
-            f"{API_BASE}/asset-uploads",
+        response = get_canva_client().post(
+            "/asset-uploads",
             headers=upload_headers,
             data=video_file
         )
@@ -53,64 +147,162 @@ def upload_video(video_path):
         print(f"Response: {response.text}")
         return None
     
-    upload_data = response.json()
+    return upload_job_started(response.json())
+
+
+def start_stream_upload(chunks, filename):
+    """Stream a video to Canva's asset-uploads endpoint as a chunked request body
+
+    Returns:
+        The Canva upload job ID, or None if the upload request failed
+
+    Raises:
+        StreamingUploadRejected: If Canva does not accept a chunked body
+    """
+    print(f"\n📤 Streaming video to Canva: {filename}...")
+
+    response = get_canva_client().post(
+        "/asset-uploads",
+        headers=asset_upload_headers(filename),
+        data=chunks
+    )
+
+    if response.status_code in STREAM_REJECTED_STATUSES:
+        raise StreamingUploadRejected(
+            f"Canva rejected the streamed upload: {response.status_code} {response.text}")
+
+    if response.status_code != 200:
+        print(f"❌ Error uploading stream: {response.status_code}")
+        print(f"Response: {response.text}")
+        return None
+
+    return upload_job_started(response.json())
+
+
+def asset_upload_headers(filename):
+    """Build the headers for an asset-uploads request (the client adds Authorization)"""
+    # Asset name is passed base64 encoded in the metadata header
+    name_base64 = base64.b64encode(filename.encode('utf-8')).decode('utf-8')
+
+    return {
+        'Content-Type': 'application/octet-stream',
+        'Asset-Upload-Metadata': f'{{"name_base64": "{name_base64}"}}'
+    }
+
+
+def upload_job_started(upload_data):
+    """Log a newly created upload job and return its ID"""
     job_id = upload_data['job']['id']
     status = upload_data['job']['status']
-    
+
     print(f"✅ Upload initiated! Job ID: {job_id}")
     print(f"   Initial status: {status}")
-    
+
+    return job_id
+
+
+def wait_for_asset(job_id, file_size=None):
+    """Wait for an asset upload job to complete, then move the asset to FOLDER_ID
+
+    Args:
+        job_id: Canva upload job ID
+        file_size: Size of the uploaded file in bytes, used to schedule status checks
+
+    Returns:
+        The asset ID, or None if the job failed or timed out
+    """
     # Step 2: Poll for upload completion and get asset ID
     print(f"⏳ Processing upload...")
-    
-    max_attempts = 60  # 5 minutes max
-    attempt = 0
-    
-    while attempt < max_attempts:
-        time.sleep(5)  # Wait before checking
-        
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-
-        response = requests.get(
-            f"{API_BASE}/asset-uploads/{job_id}",
-            headers=headers
-        )
-        
-        if response.status_code == 200:
-            job_status = response.json()['job']
-            status = job_status['status']
-            
-            if status == 'success':
-                asset_id = job_status['asset']['id']
-                asset_name = job_status['asset']['name']
-                print(f"✅ Upload complete!")
-                print(f"   Asset ID: {asset_id}")
-                print(f"   Asset name: {asset_name}")
-
-                move_asset_to_folder(asset_id)
-
-                return asset_id
-            elif status == 'failed':
-                error = job_status.get('error', {})
-                print(f"❌ Upload failed: {error.get('message', 'Unknown error')}")
-                print(f"   Error code: {error.get('code', 'unknown')}")
-                return None
-            elif status == 'in_progress':
-                print(f"   Processing... ({attempt + 1}/{max_attempts})")
-                attempt += 1
-            else:
-                print(f"   Status: {status}")
-                attempt += 1
-        else:
-            print(f"❌ Error checking upload status: {response.status_code}")
-            print(f"Response: {response.text}")
-            return None
-    
-    print(f"❌ Upload timeout - exceeded {max_attempts * 5} seconds")
-    return None
+
+    asset_id, _ = finish_upload(submit_upload_job(job_id, file_size))
+    return asset_id
+
+
+def finish_upload(poll):
+    """Wait for a polled upload job, then move its asset to FOLDER_ID
+
+    Args:
+        poll: Future from submit_upload_job
+
+    Returns:
+        (asset ID, None) on success, (None, error message) otherwise
+    """
+    try:
+        job_status = poll.result()
+    except UploadPollError as e:
+        print(f"❌ {e}")
+        return None, str(e)
+
+    if job_status is None:
+        print(f"❌ Upload timeout - exceeded {POLL_TIMEOUT} seconds")
+        return None, f"Upload timeout - exceeded {POLL_TIMEOUT} seconds"
+
+    if job_status['status'] == 'failed':
+        error = job_status.get('error', {})
+        print(f"❌ Upload failed: {error.get('message', 'Unknown error')}")
+        print(f"   Error code: {error.get('code', 'unknown')}")
+        return None, f"Upload failed: {error.get('message', 'Unknown error')}"
+
+    asset_id = job_status['asset']['id']
+    asset_name = job_status['asset']['name']
+    print(f"✅ Upload complete!")
+    print(f"   Asset ID: {asset_id}")
+    print(f"   Asset name: {asset_name}")
+
+    move_asset_to_folder(asset_id)
+
+    return asset_id, None
+
+
+def find_uploaded_asset(sha256):
+    """Find the asset uploaded earlier from a file with this SHA-256
+
+    The asset is checked to still exist in Canva, and moved to FOLDER_ID if it
+    was indexed in another folder.
+
+    Returns:
+        The asset ID, or None if no usable asset exists
+    """
+    if not sha256:
+        return None
+
+    indexed = clip_job_store.get_indexed_asset(sha256)
+    if not indexed:
+        return None
+
+    asset_id = indexed['asset_id']
+    response = get_canva_client().get(f"/assets/{asset_id}")
+
+    if response.status_code == 404:
+        print(f"⚠  Previously uploaded asset {asset_id} no longer exists, uploading again")
+        clip_job_store.delete_indexed_asset(sha256)
+        return None
+
+    if response.status_code != 200:
+        print(f"⚠  Could not check asset {asset_id}: {response.status_code}, uploading again")
+        return None
+
+    if indexed['folder_id'] != FOLDER_ID and move_asset_to_folder(asset_id):
+        index_uploaded_asset(sha256, asset_id)
+
+    print(f"✅ Identical file already in Canva, skipping upload")
+    print(f"   Asset ID: {asset_id}")
+    return asset_id
+
+
+def index_uploaded_asset(sha256, asset_id):
+    """Remember the asset uploaded from a file with this SHA-256"""
+    if sha256 and asset_id:
+        clip_job_store.put_indexed_asset(sha256, asset_id, FOLDER_ID, datetime.now(timezone.utc).isoformat())
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def move_asset_to_folder(asset_id):
@@ -123,23 +315,15 @@ def move_asset_to_folder(asset_id):
     Returns:
         bool: True if successful, False otherwise
     """
-    access_token = load_tokens()
-
     print(f"\n📁 Moving asset {asset_id} to folder {FOLDER_ID}...")
 
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-
     payload = {
         'item_id': asset_id,
         'to_folder_id': FOLDER_ID
     }
 
-    response = requests.post(
-        f"{API_BASE}/folders/move",
-        headers=headers,
+    response = get_canva_client().post(
+        "/folders/move",
         json=payload
     )
 
@@ -0,0 +1,203 @@
+"""
+Clip Job Store
+SQLite tables of clip jobs with per-stage checkpoints, so interrupted jobs can resume after a restart,
+of the Canva assets already produced for a clip, so repeat requests can reuse them,
+and of uploaded files by content hash, so byte-identical files are not uploaded twice
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIP_JOB_DB = os.getenv("CLIP_JOB_DB", os.path.join(BACKEND_DIR, 'clip_jobs.db'))
+
+# Columns of the clip_jobs table, in order
+JOB_COLUMNS = [
+    "id", "status", "stage", "title", "video_id", "start", "end",
+    # Checkpoints: set as each stage finishes
+    "workspace", "video_path", "upload_job_id", "canva_asset_id",
+    "error", "created_at", "updated_at",
+    # Content address of the clip (video, normalized range, encode profile) and hash of the produced file
+    "cache_key", "file_sha256",
+]
+
+# Statuses of jobs that are still in flight; at most one in-flight job exists per cache_key
+ACTIVE_STATUSES = ("queued", "running")
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def insert_job(job: Dict):
+    """
+    Insert a new job row.
+
+    Raises:
+        sqlite3.IntegrityError: If an in-flight job with the same cache_key exists
+    """
+    columns = [column for column in JOB_COLUMNS if column in job]
+    placeholders = ", ".join("?" for _ in columns)
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            f"INSERT INTO clip_jobs ({', '.join(quote(c) for c in columns)}) VALUES ({placeholders})",
+            [job[column] for column in columns],
+        )
+
+
+def update_job(job_id: str, **fields):
+    """Update columns of a job row."""
+    if not fields:
+        return
+    unknown = set(fields) - set(JOB_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown job columns: {', '.join(sorted(unknown))}")
+
+    assignments = ", ".join(f"{quote(column)} = ?" for column in fields)
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            f"UPDATE clip_jobs SET {assignments} WHERE id = ?",
+            [*fields.values(), job_id],
+        )
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Get a job row as a dict, or None if unknown."""
+    with closing(connect()) as conn:
+        row = conn.execute("SELECT * FROM clip_jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_jobs_with_status(statuses: List[str]) -> List[Dict]:
+    """Get all jobs with one of the given statuses, oldest first."""
+    placeholders = ", ".join("?" for _ in statuses)
+    with closing(connect()) as conn:
+        rows = conn.execute(
+            f"SELECT * FROM clip_jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+            statuses,
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def find_active_job(cache_key: str) -> Optional[Dict]:
+    """Get the in-flight job for a cache key, or None."""
+    placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+    with closing(connect()) as conn:
+        row = conn.execute(
+            f"SELECT * FROM clip_jobs WHERE cache_key = ? AND status IN ({placeholders})",
+            (cache_key, *ACTIVE_STATUSES),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def get_clip_asset(cache_key: str) -> Optional[Dict]:
+    """
+    Get the Canva asset produced for a clip, or None if it was never produced.
+
+    Returns:
+        {"cache_key": str, "video_id": str, "file_sha256": str, "canva_asset_id": str, "created_at": str}
+    """
+    with closing(connect()) as conn:
+        row = conn.execute("SELECT * FROM clip_assets WHERE cache_key = ?", (cache_key,)).fetchone()
+    return dict(row) if row else None
+
+
+def put_clip_asset(cache_key: str, video_id: str, file_sha256: Optional[str], canva_asset_id: str, created_at: str):
+    """Record the Canva asset produced for a clip."""
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO clip_assets (cache_key, video_id, file_sha256, canva_asset_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (cache_key, video_id, file_sha256, canva_asset_id, created_at),
+        )
+
+
+def get_indexed_asset(file_sha256: str) -> Optional[Dict]:
+    """
+    Get the Canva asset uploaded from a file with this SHA-256, or None.
+
+    Returns:
+        {"file_sha256": str, "asset_id": str, "folder_id": str, "created_at": str}
+    """
+    with closing(connect()) as conn:
+        row = conn.execute("SELECT * FROM canva_asset_index WHERE file_sha256 = ?", (file_sha256,)).fetchone()
+    return dict(row) if row else None
+
+
+def put_indexed_asset(file_sha256: str, asset_id: str, folder_id: str, created_at: str):
+    """Record the Canva asset (and its folder) uploaded from a file with this SHA-256."""
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO canva_asset_index (file_sha256, asset_id, folder_id, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (file_sha256, asset_id, folder_id, created_at),
+        )
+
+
+def delete_indexed_asset(file_sha256: str):
+    """Forget the Canva asset uploaded from a file with this SHA-256 (e.g. after it was deleted in Canva)."""
+    with closing(connect()) as conn, conn:
+        conn.execute("DELETE FROM canva_asset_index WHERE file_sha256 = ?", (file_sha256,))
+
+
+def delete_jobs_updated_before(statuses: List[str], cutoff: str):
+    """Delete jobs with one of the given statuses last updated before cutoff (ISO 8601)."""
+    placeholders = ", ".join("?" for _ in statuses)
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            f"DELETE FROM clip_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+            [*statuses, cutoff],
+        )
+
+
+"""
+PRIVATE METHODS
+"""
+
+def connect() -> sqlite3.Connection:
+    """Open a connection to the job database, creating the table on first use."""
+    global _initialized
+
+    conn = sqlite3.connect(CLIP_JOB_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+
+    with _init_lock:
+        if not _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(
+                f"{quote(column)} TEXT PRIMARY KEY" if column == "id" else f"{quote(column)} TEXT"
+                for column in JOB_COLUMNS
+            )
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS clip_jobs ({columns})")
+
+                # Add columns introduced after the table was first created
+                existing = {row["name"] for row in conn.execute("PRAGMA table_info(clip_jobs)")}
+                for column in JOB_COLUMNS:
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE clip_jobs ADD COLUMN {quote(column)} TEXT")
+
+                conn.execute("CREATE INDEX IF NOT EXISTS clip_jobs_status ON clip_jobs (status)")
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS clip_jobs_active_cache_key ON clip_jobs (cache_key) "
+                    f"WHERE status IN ({', '.join(repr(status) for status in ACTIVE_STATUSES)})"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS clip_assets ("
+                    "cache_key TEXT PRIMARY KEY, video_id TEXT, file_sha256 TEXT, "
+                    "canva_asset_id TEXT, created_at TEXT)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS canva_asset_index ("
+                    "file_sha256 TEXT PRIMARY KEY, asset_id TEXT, folder_id TEXT, created_at TEXT)"
+                )
+            _initialized = True
+
+    return conn
+
+
+def quote(column: str) -> str:
+    """Quote a column name ("start" and "end" are SQL keywords)."""
+    return f'"{column}"'
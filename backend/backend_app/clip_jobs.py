@@ -0,0 +1,398 @@
+"""
+Clip Jobs
+Background pipeline that runs /create clip jobs. Download, Canva upload and Canva
+polling are separate stages with their own worker pools and bounded queues, so
+the stages of different jobs overlap. Jobs and their stage checkpoints are
+persisted in the clip job store, so jobs interrupted by a restart resume from
+the last finished stage.
+"""
+
+import os
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from . import clip_job_store
+from .pipeline import Pipeline
+from .canva_auth_utils import check_tokens
+from .canva_upload_video import (
+    start_video_upload, start_stream_upload, wait_for_asset,
+    find_uploaded_asset, index_uploaded_asset, file_sha256,
+)
+from .smart_cut import CLIP_CUT_MODE
+from .youtube_util import CLIP_FORMAT, download_clip, stream_clip, timestamp_to_seconds
+
+# Workers per pipeline stage: downloads (network and CPU), uploads (network), Canva polling (mostly idle)
+CLIP_JOB_WORKERS = int(os.getenv("CLIP_JOB_WORKERS", "2"))
+CLIP_JOB_UPLOAD_WORKERS = int(os.getenv("CLIP_JOB_UPLOAD_WORKERS", "2"))
+CLIP_JOB_POLL_WORKERS = int(os.getenv("CLIP_JOB_POLL_WORKERS", "8"))
+
+# Capacity of the queues in front of the upload and poll stages; a full queue holds back the stage before it.
+# The download queue is unbounded, since /create must not block (queued jobs are persisted anyway)
+CLIP_JOB_QUEUE_SIZE = int(os.getenv("CLIP_JOB_QUEUE_SIZE", "4"))
+
+# Finished jobs are kept in the job store for this many seconds, so clients can fetch the result
+CLIP_JOB_RETENTION = int(os.getenv("CLIP_JOB_RETENTION", "86400"))
+
+# "file" downloads each clip to content/ before uploading it,
+# "stream" pipes the clip straight into the Canva upload request
+CLIP_PIPELINE_MODE = os.getenv("CLIP_PIPELINE_MODE", "file")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(BACKEND_DIR, 'content')
+
+# Everything that changes the bytes of a produced clip; part of the clip cache key
+ENCODE_PROFILE = f"{CLIP_FORMAT}|cut={CLIP_CUT_MODE}|pipeline={CLIP_PIPELINE_MODE}"
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Pipeline stages
+DOWNLOAD = "download"
+UPLOAD = "upload"
+POLL = "poll"
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+class ClipJobError(Exception):
+    """Raised by a job stage to fail the job with a user-facing message."""
+
+
+def submit_clip_job(title: str, video_id: str, start: str, end: str) -> Dict:
+    """
+    Queue a clip job and return immediately.
+
+    Clips are content-addressed by video, normalized range and encode profile:
+    if the same clip was already uploaded, the new job succeeds right away with
+    the existing Canva asset, and if the same clip is being made right now,
+    that in-flight job is returned instead of starting another one.
+
+    Returns:
+        The new (or in-flight) job (see get_clip_job)
+    """
+    cache_key = clip_cache_key(video_id, start, end)
+    now = utc_now()
+
+    # Already produced: record a job that is done from the start
+    cached = clip_job_store.get_clip_asset(cache_key)
+    if cached:
+        print(f"✓ Clip already in Canva: {cached['canva_asset_id']}")
+        job = new_job(title, video_id, start, end, cache_key, now,
+                      status=SUCCEEDED, stage="cache",
+                      canva_asset_id=cached["canva_asset_id"], file_sha256=cached["file_sha256"])
+        clip_job_store.insert_job(job)
+        return public_job(job)
+
+    # Being produced: wait on the in-flight job
+    active = clip_job_store.find_active_job(cache_key)
+    if active:
+        print(f"Clip already in progress, joining job {active['id']}")
+        return public_job(active)
+
+    job = new_job(title, video_id, start, end, cache_key, now)
+
+    prune_jobs()
+    try:
+        clip_job_store.insert_job(job)
+    except sqlite3.IntegrityError:
+        # Lost the race against an identical request submitted at the same time
+        active = clip_job_store.find_active_job(cache_key)
+        if active:
+            return public_job(active)
+        raise
+
+    get_pipeline().submit(DOWNLOAD, job["id"])
+    print(f"Queued clip job {job['id']}: {title}")
+    return public_job(job)
+
+
+def get_clip_job(job_id: str) -> Optional[Dict]:
+    """
+    Get a clip job.
+
+    Returns:
+        A copy of the job, or None if unknown:
+        {
+            "id": str,
+            "status": "queued" | "running" | "succeeded" | "failed",
+            "stage": str (current or last stage),
+            "title": str, "video_id": str, "start": str, "end": str,
+            "canva_asset_id": str (once succeeded),
+            "error": str (once failed),
+            "created_at": str, "updated_at": str (ISO 8601, UTC)
+        }
+    """
+    job = clip_job_store.get_job(job_id)
+    return public_job(job) if job else None
+
+
+def resume_clip_jobs() -> int:
+    """
+    Re-queue jobs that were queued or running when the process stopped.
+
+    Each job continues from its last checkpoint: a recorded Canva upload job is
+    polled again, a downloaded file is uploaded without downloading it again.
+
+    Jobs are re-queued from a background thread, since the upload and poll
+    queues are bounded and filling them would otherwise hold up the caller
+    (server startup) until earlier jobs finish.
+
+    Returns:
+        Number of jobs resumed
+    """
+    jobs = clip_job_store.list_jobs_with_status([QUEUED, RUNNING])
+    if jobs:
+        threading.Thread(target=requeue_jobs, args=(jobs,), name='clip-job-resume', daemon=True).start()
+    return len(jobs)
+
+
+def get_pipeline_stats() -> Dict[str, Dict]:
+    """
+    Get queue depth and utilization of each clip pipeline stage.
+
+    Returns:
+        {"download" | "upload" | "poll": {
+            "workers": int, "busy": int, "queued": int, "queue_size": int | None,
+            "processed": int, "utilization": float (busy share of worker time since start)
+        }}
+    """
+    return get_pipeline().stats()
+
+
+"""
+PRIVATE METHODS
+"""
+
+def new_job(title: str, video_id: str, start: str, end: str, cache_key: str, now: str, **fields) -> Dict:
+    """Build a new job row."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": QUEUED,
+        "stage": None,
+        "title": title,
+        "video_id": video_id,
+        "start": start,
+        "end": end,
+        "workspace": None,
+        "video_path": None,
+        "upload_job_id": None,
+        "canva_asset_id": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "cache_key": cache_key,
+        "file_sha256": None,
+    }
+    job.update(fields)
+    return job
+
+
+def requeue_jobs(jobs):
+    """Submit resumed jobs to the stage they stopped in (waits while a stage queue is full)."""
+    pipeline = get_pipeline()
+    for job in jobs:
+        print(f"Resuming clip job {job['id']} ({job['title']}) from stage: {job['stage'] or 'start'}")
+        pipeline.submit(resume_stage(job), job["id"])
+
+
+def get_pipeline() -> Pipeline:
+    """Get the clip job pipeline, starting its workers on first use."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = Pipeline(on_error=fail_job)
+            _pipeline.add_stage(DOWNLOAD, download_stage, CLIP_JOB_WORKERS)
+            _pipeline.add_stage(UPLOAD, upload_stage, CLIP_JOB_UPLOAD_WORKERS, CLIP_JOB_QUEUE_SIZE)
+            _pipeline.add_stage(POLL, poll_stage, CLIP_JOB_POLL_WORKERS, CLIP_JOB_QUEUE_SIZE)
+            _pipeline.start()
+        return _pipeline
+
+
+def update_job(job_id: str, **fields):
+    """Update fields of a job."""
+    clip_job_store.update_job(job_id, updated_at=utc_now(), **fields)
+
+
+def public_job(job: Dict) -> Dict:
+    """Strip internal checkpoint fields from a job."""
+    internal = ("workspace", "video_path", "upload_job_id", "cache_key")
+    return {key: value for key, value in job.items() if key not in internal}
+
+
+def prune_jobs():
+    """Delete finished jobs older than CLIP_JOB_RETENTION."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=CLIP_JOB_RETENTION)).isoformat()
+    clip_job_store.delete_jobs_updated_before([SUCCEEDED, FAILED], cutoff)
+
+
+def resume_stage(job: Dict) -> str:
+    """The pipeline stage an interrupted job continues from, based on its checkpoints."""
+    if job["upload_job_id"] or job["canva_asset_id"]:
+        return POLL
+    if job["video_path"] and os.path.exists(job["video_path"]):
+        return UPLOAD
+    return DOWNLOAD
+
+
+def fail_job(job_id: str, error: Exception):
+    """Record a failed job."""
+    update_job(job_id, status=FAILED, error=str(error))
+    print(f"✗ Clip job {job_id} failed: {error}")
+
+
+def validate_auth(job_id: str):
+    """Check Canva tokens (cached by the Canva client)."""
+    update_job(job_id, status=RUNNING, stage="validate_auth")
+    if not check_tokens():
+        raise ClipJobError("Canva authentication failed. Please authenticate first.")
+
+
+def download_stage(job_id: str) -> Optional[str]:
+    """
+    Download the clip into a workspace of its own (or stream it straight into a Canva upload).
+
+    Returns:
+        The next stage
+    """
+    job = clip_job_store.get_job(job_id)
+    title = job["title"]
+    video_url = f"https://www.youtube.com/watch?v={job['video_id']}"
+
+    # Step 1: Check Canva tokens
+    validate_auth(job_id)
+
+    # Stream mode: mux the clip straight into the Canva upload, no local file
+    if CLIP_PIPELINE_MODE == "stream":
+        update_job(job_id, stage="stream_upload")
+        digest = hashlib.sha256()
+
+        def hashed(chunks):
+            for chunk in chunks:
+                digest.update(chunk)
+                yield chunk
+
+        try:
+            upload_job_id = start_stream_upload(hashed(stream_clip(video_url, job["start"], job["end"])), f"{title}.mp4")
+            if not upload_job_id:
+                raise ClipJobError("Canva upload failed")
+            update_job(job_id, upload_job_id=upload_job_id, file_sha256=digest.hexdigest())
+            return POLL
+        except ClipJobError:
+            raise
+        except Exception as e:
+            # Includes StreamingUploadRejected, when Canva does not accept chunked bodies
+            print(f"⚠  Streaming failed: {e}")
+            print("   Falling back to download + upload...")
+
+    # Step 2: Download video into a workspace of its own
+    update_job(job_id, stage="download")
+    os.makedirs(CONTENT_DIR, exist_ok=True)
+    if job["workspace"]:
+        shutil.rmtree(job["workspace"], ignore_errors=True)
+    workspace = tempfile.mkdtemp(prefix=f'job-{job_id}-', dir=CONTENT_DIR)
+    update_job(job_id, workspace=workspace)
+
+    video_path = download_clip(video_url, job["start"], job["end"], title, output_dir=workspace)
+    if not video_path:
+        shutil.rmtree(workspace, ignore_errors=True)
+        raise ClipJobError("Video download failed")
+
+    # The clip is written by yt-dlp/ffmpeg themselves and +faststart rewrites the MP4 in
+    # place, so the final bytes never pass through a pipe we could hash; hash the file once
+    # here (it is still in the page cache) and reuse the digest in the upload stage
+    update_job(job_id, video_path=video_path, file_sha256=file_sha256(video_path))
+    print(f"\n✓ Video downloaded: {os.path.basename(video_path)}")
+    return UPLOAD
+
+
+def upload_stage(job_id: str) -> Optional[str]:
+    """
+    Upload the downloaded clip to Canva, unless identical bytes are already there.
+
+    Returns:
+        The next stage, or None if an existing asset was reused
+    """
+    job = clip_job_store.get_job(job_id)
+    video_path = job["video_path"]
+
+    # Resumed jobs may not have passed the download stage in this process
+    validate_auth(job_id)
+
+    # Identical bytes already uploaded (e.g. another range snapped to the same keyframes)
+    asset_id = find_uploaded_asset(job["file_sha256"])
+    if asset_id:
+        complete_job(job_id, asset_id)
+        return None
+
+    # Step 3: Upload to Canva
+    update_job(job_id, stage="upload")
+    upload_job_id = start_video_upload(video_path)
+    if not upload_job_id:
+        print(f"   Video file saved at: {video_path}")
+        raise ClipJobError(f"Canva upload failed (video file saved at {video_path})")
+    update_job(job_id, upload_job_id=upload_job_id)
+    return POLL
+
+
+def poll_stage(job_id: str) -> Optional[str]:
+    """Wait for Canva to process the upload, then complete the job."""
+    job = clip_job_store.get_job(job_id)
+
+    if not job["canva_asset_id"]:
+        # Step 4: Wait for Canva to process the upload
+        update_job(job_id, status=RUNNING, stage="canva_processing")
+        video_path = job["video_path"]
+        file_size = os.path.getsize(video_path) if video_path and os.path.exists(video_path) else None
+        asset_id = wait_for_asset(job["upload_job_id"], file_size=file_size)
+        if not asset_id:
+            raise ClipJobError("Canva upload failed")
+        index_uploaded_asset(job["file_sha256"], asset_id)
+    else:
+        asset_id = job["canva_asset_id"]
+
+    complete_job(job_id, asset_id)
+    return None
+
+
+def complete_job(job_id: str, asset_id: str):
+    """Record the asset, delete the local workspace and mark the job succeeded."""
+    update_job(job_id, canva_asset_id=asset_id)
+
+    # Remember the asset, so repeat requests for the same clip reuse it
+    job = clip_job_store.get_job(job_id)
+    clip_job_store.put_clip_asset(job["cache_key"], job["video_id"], job["file_sha256"], asset_id, utc_now())
+
+    # Step 5: Delete local file
+    update_job(job_id, stage="cleanup")
+    workspace = job["workspace"]
+    if workspace and os.path.exists(workspace):
+        try:
+            shutil.rmtree(workspace)
+            print(f"✓ Deleted local workspace: {os.path.basename(workspace)}")
+        except Exception as e:
+            print(f"⚠  Warning: Could not delete local file: {e}")
+            print(f"   Please manually delete: {workspace}")
+
+    update_job(job_id, status=SUCCEEDED)
+    print(f"✓ Clip job {job_id} complete: {asset_id}")
+
+
+def clip_cache_key(video_id: str, start: str, end: str) -> str:
+    """Content address of a clip: video ID, normalized start/end and encode profile."""
+    start_sec = timestamp_to_seconds(start)
+    end_sec = timestamp_to_seconds(end)
+    return hashlib.sha256(f"{video_id}|{start_sec}|{end_sec}|{ENCODE_PROFILE}".encode()).hexdigest()
+
+
+def utc_now() -> str:
+    """Current time as an ISO 8601 UTC string."""
+    return datetime.now(timezone.utc).isoformat()
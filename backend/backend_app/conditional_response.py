@@ -0,0 +1,71 @@
+"""
+Conditional Response
+Content-hash ETags with If-None-Match handling (304 Not Modified) and gzip or
+brotli compression for large JSON responses
+"""
+
+import os
+import gzip
+import hashlib
+from functools import wraps
+from typing import Callable
+from flask import Response, make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def conditional(view: Callable) -> Callable:
+    """
+    Decorate a GET view so that successful responses carry a content-hash ETag,
+    are answered with 304 Not Modified when the client's If-None-Match matches,
+    and are compressed when the client accepts it.
+
+    Clients must revalidate on every request (Cache-Control: no-cache), so an
+    unchanged response costs a header exchange instead of the full body.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if request.method != 'GET' or response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        # Weak: the same content is equivalent whether or not it is compressed
+        response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32], weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+
+        if response.status_code == 200:
+            compress(response)
+        return response
+
+    return wrapper
+
+
+"""
+PRIVATE METHODS
+"""
+
+def compress(response: Response):
+    """Compress the body with brotli or gzip, whichever the client accepts (brotli preferred)."""
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE or 'Content-Encoding' in response.headers:
+        return
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
@@ -0,0 +1,224 @@
+"""
+Media Cache
+Local cache of full episode sources, so many clips can be cut from one download
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict
+from .youtube_util import CLIP_FORMAT, download_with_cached_formats
+from .smart_cut import CLIP_CUT_MODE, smart_cut, reencode_cut
+
+# Clip source mode: "remote" fetches each range from YouTube, "local" cuts from a cached episode source
+CLIP_SOURCE_MODE = os.getenv("CLIP_SOURCE_MODE", "remote")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(BACKEND_DIR, 'media_cache'))
+# Least recently used sources are evicted once the cache grows past this size
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_GB", "20")) * 1024 ** 3
+# Number of ffmpeg cuts run in parallel
+MEDIA_CUT_WORKERS = int(os.getenv("MEDIA_CUT_WORKERS", str(os.cpu_count() or 2)))
+
+# video_id -> Future resolving to the source path, for downloads in progress
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+# source path -> number of callers using it; referenced sources are never evicted.
+# Guarded by _inflight_lock
+_source_refs: Dict[str, int] = {}
+
+_cut_pool = None
+_cut_pool_lock = threading.Lock()
+
+
+def local_source_enabled() -> bool:
+    """Check whether clips should be cut from a locally cached episode source."""
+    return CLIP_SOURCE_MODE == "local"
+
+
+def get_episode_source(video_id: str) -> str:
+    """
+    Get the path of the cached 1080p source for an episode, downloading it if needed.
+
+    Concurrent callers for the same episode share one in-flight download. The
+    source is referenced on behalf of the caller and is not evicted until the
+    caller hands it back with release_episode_source.
+
+    Args:
+        video_id: YouTube video ID
+
+    Returns:
+        Path of the cached source file
+    """
+    path = source_path(video_id)
+
+    with _inflight_lock:
+        # Referenced before the existence check, so no eviction can remove it in between
+        reference_source(path)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        future = _inflight.get(video_id)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[video_id] = future
+
+    try:
+        if not is_owner:
+            print(f"Waiting for in-flight source download of {video_id}...")
+            return future.result()
+
+        try:
+            download_episode_source(video_id)
+            future.set_result(path)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(video_id, None)
+    except Exception:
+        release_episode_source(path)
+        raise
+
+    evict_sources()
+    return path
+
+
+def release_episode_source(path: str):
+    """Hand back a source returned by get_episode_source, allowing it to be evicted again."""
+    with _inflight_lock:
+        refs = _source_refs.get(path, 0) - 1
+        if refs > 0:
+            _source_refs[path] = refs
+        else:
+            _source_refs.pop(path, None)
+
+
+def cut_clip(source: str, start_sec: float, end_sec: float, output_path: str) -> str:
+    """
+    Cut a clip out of a local source with ffmpeg, using the configured CLIP_CUT_MODE.
+
+    The source is referenced for the duration of the cut, so it is not evicted mid-cut.
+
+    Returns:
+        The output path
+    """
+    with _inflight_lock:
+        reference_source(source)
+    try:
+        return get_cut_pool().submit(run_cut, source, start_sec, end_sec, output_path).result()
+    finally:
+        release_episode_source(source)
+
+
+"""
+PRIVATE METHODS
+"""
+
+def source_path(video_id: str) -> str:
+    """Path of the cached source for a video."""
+    return os.path.join(MEDIA_CACHE_DIR, f"{video_id}.mp4")
+
+
+def reference_source(path: str):
+    """Count one more user of a source (the caller holds _inflight_lock)."""
+    _source_refs[path] = _source_refs.get(path, 0) + 1
+
+
+def download_episode_source(video_id: str):
+    """Download the full 1080p episode into the media cache."""
+    os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+
+    # Download into a private directory and move into place once complete,
+    # so a partially written source is never picked up by another request
+    download_dir = os.path.join(MEDIA_CACHE_DIR, f".{video_id}.download")
+    shutil.rmtree(download_dir, ignore_errors=True)
+    os.makedirs(download_dir)
+
+    print(f"⏬ Downloading episode source for {video_id}...")
+    ydl_opts = {
+        'format': CLIP_FORMAT,
+        'merge_output_format': 'mp4',
+        'outtmpl': os.path.join(download_dir, f'{video_id}.%(ext)s'),
+        'quiet': True,
+        'noprogress': True,
+    }
+
+    try:
+        download_with_cached_formats(f"https://www.youtube.com/watch?v={video_id}", ydl_opts)
+
+        downloaded = os.path.join(download_dir, f"{video_id}.mp4")
+        if not os.path.exists(downloaded):
+            raise RuntimeError(f"Episode source for {video_id} was not produced")
+
+        os.replace(downloaded, source_path(video_id))
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    print(f"✓ Cached episode source: {source_path(video_id)}")
+
+
+def evict_sources():
+    """
+    Delete least recently used sources until the cache fits MEDIA_CACHE_MAX_BYTES.
+
+    Sources referenced by a caller (being cut, streamed or just handed back) are skipped.
+    """
+    sources = []
+    for name in os.listdir(MEDIA_CACHE_DIR):
+        path = os.path.join(MEDIA_CACHE_DIR, name)
+        if name.endswith('.mp4') and os.path.isfile(path):
+            stat = os.stat(path)
+            sources.append((stat.st_mtime, stat.st_size, path))
+
+    total_size = sum(size for _, size, _ in sources)
+    for _, size, path in sorted(sources):
+        if total_size <= MEDIA_CACHE_MAX_BYTES:
+            break
+        with _inflight_lock:
+            if _source_refs.get(path):
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠  Warning: Could not evict {path}: {e}")
+                continue
+        total_size -= size
+        print(f"🗑  Evicted cached source: {os.path.basename(path)}")
+
+
+def get_cut_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool used for ffmpeg cuts."""
+    global _cut_pool
+    with _cut_pool_lock:
+        if _cut_pool is None:
+            _cut_pool = ProcessPoolExecutor(max_workers=MEDIA_CUT_WORKERS)
+        return _cut_pool
+
+
+def run_cut(source: str, start_sec: float, end_sec: float, output_path: str) -> str:
+    """Run one ffmpeg cut (executed in the cut process pool)."""
+    if CLIP_CUT_MODE == "smart":
+        return smart_cut(source, start_sec, end_sec, output_path)
+    if CLIP_CUT_MODE == "reencode":
+        return reencode_cut(source, start_sec, end_sec, output_path)
+
+    command = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-ss', str(start_sec), '-to', str(end_sec),
+        '-i', source,
+        '-map', '0', '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        '-movflags', '+faststart',
+        output_path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg cut failed: {result.stderr.strip()}")
+    return output_path
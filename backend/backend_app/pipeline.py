@@ -0,0 +1,117 @@
+"""
+Pipeline
+Stages with their own worker pools connected by bounded queues, so different
+items can be in different stages at the same time (while one item uploads,
+the next one is already downloading)
+"""
+
+import time
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+
+class Stage:
+    """One pipeline stage: a queue of items and the workers that process them."""
+
+    def __init__(self, pipeline: 'Pipeline', name: str, handler: Callable[[str], Optional[str]],
+                 workers: int, queue_size: int = 0):
+        self.pipeline = pipeline
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        self._lock = threading.Lock()
+        self._running: Dict[int, float] = {}   # worker thread ident -> start of the current item
+        self._busy_seconds = 0.0
+        self._processed = 0
+        self._started_at = None
+
+    def start(self):
+        """Start the stage's worker threads."""
+        self._started_at = time.monotonic()
+        for index in range(self.workers):
+            threading.Thread(target=self.work, name=f'{self.name}-{index}', daemon=True).start()
+
+    def work(self):
+        """Process items from the queue and pass each one on to the stage its handler returns."""
+        worker = threading.get_ident()
+        while True:
+            item = self.queue.get()
+            with self._lock:
+                self._running[worker] = time.monotonic()
+
+            next_stage = None
+            try:
+                next_stage = self.handler(item)
+            except Exception as e:
+                self.fail(item, e)
+            finally:
+                with self._lock:
+                    self._busy_seconds += time.monotonic() - self._running.pop(worker)
+                    self._processed += 1
+
+            if next_stage:
+                try:
+                    # Blocks while the next stage's queue is full (backpressure)
+                    self.pipeline.submit(next_stage, item)
+                except Exception as e:
+                    self.fail(item, e)
+
+    def fail(self, item: str, error: Exception):
+        """Pass a failed item to the pipeline's on_error; an error in on_error itself is logged, never raised."""
+        try:
+            self.pipeline.on_error(item, error)
+        except Exception as e:
+            # Raising here would end the worker thread and shrink the stage for good
+            print(f"✗ {self.name}: error handling failure of {item} ({error}): {e}")
+
+    def stats(self) -> Dict:
+        """Queue depth and worker utilization of the stage."""
+        now = time.monotonic()
+        with self._lock:
+            busy = len(self._running)
+            busy_seconds = self._busy_seconds + sum(now - started for started in self._running.values())
+            processed = self._processed
+
+        uptime = now - self._started_at if self._started_at else 0
+        return {
+            "workers": self.workers,
+            "busy": busy,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize or None,
+            "processed": processed,
+            "utilization": round(busy_seconds / (uptime * self.workers), 3) if uptime else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Named stages run by their own worker pools.
+
+    A stage handler takes an item and returns the name of the stage the item
+    moves to next, or None when the item is done. Exceptions raised by a
+    handler end the item and are passed to on_error.
+    """
+
+    def __init__(self, on_error: Callable[[str, Exception], None]):
+        self.on_error = on_error
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, handler: Callable[[str], Optional[str]], workers: int, queue_size: int = 0):
+        """Add a stage; queue_size 0 means unbounded."""
+        self.stages[name] = Stage(self, name, handler, workers, queue_size)
+
+    def start(self):
+        """Start the workers of every stage."""
+        for stage in self.stages.values():
+            stage.start()
+
+    def submit(self, stage: str, item: str):
+        """Queue an item for a stage, waiting while its queue is full."""
+        self.stages[stage].queue.put(item)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-stage queue depth and utilization (see Stage.stats)."""
+        return {name: stage.stats() for name, stage in self.stages.items()}
@@ -0,0 +1,301 @@
+"""
+Smart Cut
+Frame-accurate clip cutting that only re-encodes the partial GOPs at the clip boundaries
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+# How clips are cut:
+#   "reencode" - re-encode the whole clip
+#   "smart"    - re-encode only the partial GOPs at both ends, stream-copy the rest (experimental)
+#   "copy"     - stream-copy only (fast, but cuts snap to keyframes)
+# Re-encoding is the default, also for cuts from the local media cache: a smart
+# cut is only correct if its boundary encodes match the source's parameters
+CLIP_CUT_MODE = os.getenv("CLIP_CUT_MODE", "reencode")
+
+# Seconds around the cut points that are searched for keyframes
+KEYFRAME_SEARCH_WINDOW = 30
+
+# Quality used for the re-encoded boundary pieces
+BOUNDARY_CRF = "18"
+
+# A smart-cut clip whose duration is off by more than this many seconds is discarded
+DURATION_TOLERANCE = 0.1
+
+# codec_name -> (encoder, piece container extension, bitstream filter for the copied piece)
+# H.264/HEVC pieces are written as MPEG-TS so every piece carries its own
+# parameter sets in-band and the pieces can be joined without re-encoding.
+ENCODERS = {
+    'h264': ('libx264', '.ts', 'h264_mp4toannexb'),
+    'hevc': ('libx265', '.ts', 'hevc_mp4toannexb'),
+    'vp9': ('libvpx-vp9', '.mkv', None),
+    'av1': ('libsvtav1', '.mkv', None),
+}
+
+
+def smart_cut_enabled() -> bool:
+    """Check whether clips should be cut with the smart-cut engine."""
+    return CLIP_CUT_MODE == "smart"
+
+
+def probe_keyframes(source: str, start_sec: float = 0, end_sec: Optional[float] = None) -> List[float]:
+    """
+    Get keyframe timestamps of the first video stream around a time range.
+
+    Only packet headers are read (no decoding), and only the part of the
+    source within KEYFRAME_SEARCH_WINDOW of the range, so this also works
+    cheaply on remote stream URLs.
+
+    Args:
+        source: Local file path or stream URL
+        start_sec: Start of the range of interest
+        end_sec: End of the range of interest (None for end of file)
+
+    Returns:
+        Sorted list of keyframe timestamps in seconds
+    """
+    interval_start = max(0, start_sec - KEYFRAME_SEARCH_WINDOW)
+    interval_end = f"{end_sec + KEYFRAME_SEARCH_WINDOW}" if end_sec is not None else ""
+
+    command = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-read_intervals', f"{interval_start}%{interval_end}",
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        source,
+    ]
+    result = run_ffmpeg(command)
+
+    keyframes = set()
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) >= 2 and 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+            keyframes.add(float(parts[0]))
+    return sorted(keyframes)
+
+
+def probe_start_time(source: str) -> float:
+    """Get the timestamp of the first video packet of a file (0 if it has none)."""
+    result = run_ffmpeg([
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-read_intervals', '%+#1',
+        '-show_entries', 'packet=pts_time',
+        '-of', 'csv=p=0',
+        source,
+    ])
+    for line in result.stdout.splitlines():
+        value = line.strip().rstrip(',')
+        if value not in ('', 'N/A'):
+            return float(value)
+    return 0.0
+
+
+def smart_cut(source: str, start_sec: float, end_sec: float, output_path: str) -> str:
+    """
+    Cut [start_sec, end_sec) out of a local source with frame accuracy.
+
+    The video between the first and last keyframe inside the range is
+    stream-copied; only the partial GOPs before the first keyframe and after
+    the last keyframe are re-encoded. Audio is re-encoded for the whole clip,
+    which is cheap compared to video.
+
+    The joined clip is checked (duration and a full decode); if it fails the
+    check, or any step fails, the whole clip is re-encoded instead.
+
+    Args:
+        source: Local source file
+        start_sec: Clip start, in seconds of the source timeline
+        end_sec: Clip end, in seconds of the source timeline
+        output_path: Path of the .mp4 to write
+
+    Returns:
+        The output path
+    """
+    stream = probe_video_stream(source)
+    encoder = ENCODERS.get(stream.get('codec_name'))
+    plan = plan_pieces(probe_keyframes(source, start_sec, end_sec), start_sec, end_sec)
+
+    # Nothing to stream-copy: clip shorter than a GOP, or a codec we cannot match
+    if not encoder or plan is None:
+        return reencode_cut(source, start_sec, end_sec, output_path)
+
+    try:
+        join_pieces(source, plan, start_sec, end_sec, output_path, encoder, stream)
+        verify_clip(output_path, end_sec - start_sec)
+    except RuntimeError as e:
+        print(f"⚠  Smart cut failed ({e}), re-encoding the whole clip instead")
+        return reencode_cut(source, start_sec, end_sec, output_path)
+
+    return output_path
+
+
+def plan_pieces(keyframes: List[float], start_sec: float,
+                end_sec: float) -> Optional[List[Tuple[str, float, float]]]:
+    """
+    Split [start_sec, end_sec) into pieces at the keyframes inside it.
+
+    Returns:
+        List of ("encode" | "copy", piece start, piece end): a re-encoded head
+        up to the first keyframe (unless the clip starts on one), the whole
+        GOPs from the first to the last keyframe, copied, and a re-encoded tail
+        from the last keyframe. None if fewer than two keyframes fall inside
+        the range, so there is nothing to copy.
+    """
+    inside = sorted(k for k in keyframes if start_sec <= k < end_sec)
+    if len(inside) < 2:
+        return None
+
+    first_key, last_key = inside[0], inside[-1]
+    pieces = []
+    if first_key > start_sec:
+        pieces.append(("encode", start_sec, first_key))
+    pieces.append(("copy", first_key, last_key))
+    pieces.append(("encode", last_key, end_sec))
+    return pieces
+
+
+def reencode_cut(source: str, start_sec: float, end_sec: float, output_path: str) -> str:
+    """Cut a clip by re-encoding all of it (fallback when smart cut is not possible)."""
+    run_ffmpeg([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-ss', seconds(start_sec), '-to', seconds(end_sec), '-i', source,
+        '-map', '0:v:0', '-map', '0:a:0?',
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', BOUNDARY_CRF,
+        '-c:a', 'aac', '-b:a', '192k',
+        '-movflags', '+faststart',
+        output_path,
+    ])
+    return output_path
+
+
+"""
+PRIVATE METHODS
+"""
+
+def join_pieces(source: str, plan: List[Tuple[str, float, float]], start_sec: float, end_sec: float,
+                output_path: str, encoder: Tuple, stream: Dict):
+    """Write the planned pieces and join them, with the audio of the exact range, into output_path."""
+    video_encoder, extension, bitstream_filter = encoder
+
+    work_dir = tempfile.mkdtemp(prefix='.smartcut-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        pieces = []
+        for index, (kind, piece_start, piece_end) in enumerate(plan):
+            piece = os.path.join(work_dir, f"piece{index}{extension}")
+            if kind == "encode":
+                encode_piece(source, piece_start, piece_end, piece, video_encoder, stream)
+            else:
+                # Whole GOPs, copied as-is
+                command = [
+                    'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                    '-ss', seconds(piece_start), '-i', source,
+                    '-t', seconds(piece_end - piece_start),
+                    '-map', '0:v:0', '-c:v', 'copy',
+                ]
+                if bitstream_filter:
+                    command += ['-bsf:v', bitstream_filter]
+                run_ffmpeg(command + [piece])
+            pieces.append(piece)
+
+        concat_list = os.path.join(work_dir, 'pieces.txt')
+        with open(concat_list, 'w') as f:
+            for piece in pieces:
+                f.write(f"file '{piece}'\n")
+
+        # Join the video pieces losslessly and add the audio for the exact range
+        run_ffmpeg([
+            'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'concat', '-safe', '0', '-i', concat_list,
+            '-ss', seconds(start_sec), '-to', seconds(end_sec), '-i', source,
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k',
+            '-movflags', '+faststart',
+            output_path,
+        ])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def verify_clip(path: str, expected_duration: float):
+    """
+    Check a joined clip: its video duration must match the range, and the
+    whole video stream must decode without errors (parameter set or timestamp
+    mismatches between the pieces show up as decode errors).
+
+    Raises:
+        RuntimeError: If the clip fails either check
+    """
+    result = run_ffmpeg([
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=duration:format=duration',
+        '-of', 'json',
+        path,
+    ])
+    data = json.loads(result.stdout or '{}')
+    streams = data.get('streams', [])
+    duration = (streams[0].get('duration') if streams else None) or data.get('format', {}).get('duration')
+    if duration is None or abs(float(duration) - expected_duration) > DURATION_TOLERANCE:
+        raise RuntimeError(f"clip is {duration}s long, expected {expected_duration:.3f}s")
+
+    decode = run_ffmpeg([
+        'ffmpeg', '-hide_banner', '-v', 'error', '-xerror',
+        '-i', path, '-map', '0:v:0', '-f', 'null', '-',
+    ])
+    if decode.stderr.strip():
+        raise RuntimeError(f"clip does not decode cleanly: {decode.stderr.strip()}")
+
+def probe_video_stream(source: str) -> Dict:
+    """Get codec parameters of the first video stream."""
+    result = run_ffmpeg([
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,profile,level,pix_fmt,width,height',
+        '-of', 'json',
+        source,
+    ])
+    streams = json.loads(result.stdout or '{}').get('streams', [])
+    return streams[0] if streams else {}
+
+
+def encode_piece(source: str, start_sec: float, end_sec: float, output_path: str,
+                 video_encoder: str, stream: Dict):
+    """Re-encode a boundary piece with parameters matching the copied stream."""
+    command = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-ss', seconds(start_sec), '-i', source,
+        '-t', seconds(end_sec - start_sec),
+        '-map', '0:v:0',
+        '-c:v', video_encoder, '-crf', BOUNDARY_CRF,
+    ]
+    if stream.get('pix_fmt'):
+        command += ['-pix_fmt', stream['pix_fmt']]
+    if video_encoder == 'libx264':
+        command += ['-preset', 'veryfast']
+        if stream.get('profile'):
+            command += ['-profile:v', stream['profile'].lower().replace(' ', '')]
+        if stream.get('level', 0) > 0:
+            command += ['-level:v', f"{stream['level'] / 10:.1f}"]
+    elif video_encoder == 'libvpx-vp9':
+        command += ['-b:v', '0', '-row-mt', '1', '-deadline', 'realtime']
+    run_ffmpeg(command + [output_path])
+
+
+def run_ffmpeg(command: List[str]) -> subprocess.CompletedProcess:
+    """Run an ffmpeg/ffprobe command, raising with its stderr on failure."""
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{command[0]} failed: {result.stderr.strip()}")
+    return result
+
+
+def seconds(value: float) -> str:
+    """Format seconds for an ffmpeg command line."""
+    return f"{value:.6f}"
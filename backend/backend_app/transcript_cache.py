@@ -0,0 +1,176 @@
+"""
+Transcript Cache
+Caches each project's resolved YouTube video and transcript, with an optional
+background warmer that prefetches transcripts for listed projects
+"""
+
+import os
+import time
+import queue
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from .notion_parser import get_project_details
+from .youtube_util import search_youtube_video, get_video_transcript
+
+# Cached transcripts are refetched after this many seconds
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", "86400"))
+
+# Prefetch transcripts of listed projects in the background
+TRANSCRIPT_PREFETCH = os.getenv("TRANSCRIPT_PREFETCH", "false").lower() == "true"
+TRANSCRIPT_PREFETCH_WORKERS = int(os.getenv("TRANSCRIPT_PREFETCH_WORKERS", "2"))
+
+# project_id -> {"video_id", "transcript", "fetched_at"}
+_cache: Dict[str, Dict] = {}
+# project_id -> Future, for fetches in progress
+_inflight: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+# Prefetch queue of (priority, sequence, project); lower priority values are fetched first
+_prefetch_queue = queue.PriorityQueue()
+_prefetch_queued = set()
+_prefetch_sequence = itertools.count()
+_prefetch_workers_started = False
+
+# Number of interactive fetches running; prefetch workers wait while it is non-zero
+_interactive_count = 0
+_interactive_idle = threading.Condition(_lock)
+
+
+def fetch_project_transcript(project_id: str, project: Optional[Dict] = None) -> Dict:
+    """
+    Get the YouTube video and transcript of a project, using the transcript cache.
+
+    Concurrent requests for the same project (including a background prefetch)
+    share one fetch.
+
+    Args:
+        project_id: Notion page ID of the project
+        project: Project data (episode, podcast_show), if already known
+
+    Returns:
+        {"video_id": str, "transcript": List[Dict]}
+    """
+    global _interactive_count
+
+    with _lock:
+        _interactive_count += 1
+    try:
+        return get_or_fetch(project_id, project)
+    finally:
+        with _lock:
+            _interactive_count -= 1
+            _interactive_idle.notify_all()
+
+
+def prefetch_transcripts(projects: List[Dict]):
+    """
+    Queue background fetches of transcripts for listed projects, in list order.
+
+    Does nothing unless TRANSCRIPT_PREFETCH is enabled. Returns immediately.
+    """
+    if not TRANSCRIPT_PREFETCH:
+        return
+
+    start_prefetch_workers()
+
+    queued = 0
+    with _lock:
+        for priority, project in enumerate(projects):
+            project_id = project["id"]
+            if is_cached(project_id) or project_id in _inflight or project_id in _prefetch_queued:
+                continue
+            _prefetch_queued.add(project_id)
+            _prefetch_queue.put((priority, next(_prefetch_sequence), project))
+            queued += 1
+
+    if queued:
+        print(f"Prefetching transcripts for {queued} project(s)")
+
+
+"""
+PRIVATE METHODS
+"""
+
+def get_or_fetch(project_id: str, project: Optional[Dict] = None) -> Dict:
+    """Return the cached transcript of a project, fetching it (once) on a miss."""
+    with _lock:
+        if is_cached(project_id):
+            return _cache[project_id]
+
+        future = _inflight.get(project_id)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[project_id] = future
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        entry = fetch_transcript(project_id, project)
+        with _lock:
+            _cache[project_id] = entry
+        future.set_result(entry)
+        return entry
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(project_id, None)
+
+
+def fetch_transcript(project_id: str, project: Optional[Dict] = None) -> Dict:
+    """Resolve the project's YouTube video and fetch its transcript."""
+    if not project or not project.get("episode"):
+        project = get_project_details(project_id)
+
+    search_query = f"{project['episode']} {project['podcast_show']}"
+    video_id = search_youtube_video(search_query)
+
+    # Extract Transcript of video
+    transcript = get_video_transcript(video_id)
+
+    return {
+        "video_id": video_id,
+        "transcript": transcript,
+        "fetched_at": time.time(),
+    }
+
+
+def is_cached(project_id: str) -> bool:
+    """Check for a fresh cache entry (caller holds _lock)."""
+    entry = _cache.get(project_id)
+    return bool(entry) and time.time() - entry["fetched_at"] < TRANSCRIPT_CACHE_TTL
+
+
+def start_prefetch_workers():
+    """Start the background prefetch workers once."""
+    global _prefetch_workers_started
+
+    with _lock:
+        if _prefetch_workers_started:
+            return
+        _prefetch_workers_started = True
+
+    for index in range(TRANSCRIPT_PREFETCH_WORKERS):
+        threading.Thread(target=prefetch_worker, name=f'transcript-prefetch-{index}', daemon=True).start()
+
+
+def prefetch_worker():
+    """Fetch queued transcripts, yielding to interactive requests."""
+    while True:
+        _, _, project = _prefetch_queue.get()
+
+        # Let interactive requests go first
+        with _interactive_idle:
+            _prefetch_queued.discard(project["id"])
+            _interactive_idle.wait_for(lambda: _interactive_count == 0)
+
+        try:
+            get_or_fetch(project["id"], project)
+            print(f"✓ Prefetched transcript for {project.get('episode') or project['id']}")
+        except Exception as e:
+            print(f"⚠  Transcript prefetch failed for {project['id']}: {e}")
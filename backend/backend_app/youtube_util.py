@@ -4,10 +4,40 @@ Functions for working with YouTube videos, including transcript fetching
 """
 
 import re
-from typing import List, Dict, Optional
+import copy
+import time
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional
+from urllib.parse import urlparse, parse_qs
 from youtube_transcript_api import YouTubeTranscriptApi
 import yt_dlp
-from yt_dlp.utils import download_range_func
+from yt_dlp.utils import download_range_func, DownloadError
+
+# Format used for every clip download
+CLIP_FORMAT = 'bestvideo[height<=1080]+bestaudio/best[height<=1080]/best'
+
+# Stream URLs are treated as expired this many seconds before YouTube's own expiry
+FORMAT_CACHE_EXPIRY_MARGIN = 300
+# Lifetime used when a stream URL does not carry an expire parameter
+FORMAT_CACHE_DEFAULT_TTL = 3600
+
+# Number of ranges downloaded in parallel by download_clips
+CLIP_DOWNLOAD_WORKERS = int(os.getenv("CLIP_DOWNLOAD_WORKERS", "4"))
+
+# Streamed clips are read from ffmpeg in chunks of this size,
+# with at most STREAM_BUFFER_CHUNKS chunks buffered ahead of the consumer
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_BUFFER_CHUNKS = int(os.getenv("STREAM_BUFFER_CHUNKS", "8"))
+
+# video_id -> {"info", "format_ids", "stream_urls", "expires_at"}
+_format_cache: Dict[str, Dict] = {}
+_format_cache_lock = threading.Lock()
 
 def get_video_transcript(video_id: str) -> Dict:
     """
@@ -93,8 +123,79 @@ def search_youtube_video(search_query: str):
     return best_result["video_id"]
 
 
-def download_clip(url, start_time, end_time, output_title=None):
-    """Download a YouTube clip between start_time and end_time."""
+def get_video_formats(video_id: str, refresh: bool = False) -> Dict:
+    """
+    Get the extracted format metadata for a video, using the per-video cache.
+
+    The first call for a video runs a full yt-dlp extraction; later calls reuse
+    the cached info dict until its stream URLs are about to expire.
+
+    Args:
+        video_id: YouTube video ID
+        refresh: Force a fresh extraction even if a cached entry is valid
+
+    Returns:
+        Dictionary with the cached entry:
+        {
+            "info": Dict (sanitized yt-dlp info dict),
+            "format_ids": List[str],
+            "stream_urls": List[str],
+            "expires_at": float (unix time),
+            "extracted_at": float (unix time)
+        }
+    """
+    with _format_cache_lock:
+        entry = _format_cache.get(video_id)
+        if entry and not refresh and entry["expires_at"] > time.time():
+            return entry
+
+    print(f"Extracting formats for {video_id}...")
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'format': CLIP_FORMAT,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        info = ydl.sanitize_info(info)
+
+    selected = info.get('requested_formats') or [info]
+    stream_urls = [fmt['url'] for fmt in selected if fmt.get('url')]
+    entry = {
+        "info": info,
+        "format_ids": [fmt.get('format_id') for fmt in selected],
+        "stream_urls": stream_urls,
+        "expires_at": stream_urls_expiry(stream_urls) - FORMAT_CACHE_EXPIRY_MARGIN,
+        "extracted_at": time.time(),
+    }
+
+    with _format_cache_lock:
+        _format_cache[video_id] = entry
+
+    print(f"✓ Cached formats {'+'.join(entry['format_ids'])} for {video_id}")
+    return entry
+
+
+def invalidate_video_formats(video_id: str):
+    """Drop the cached format metadata for a video."""
+    with _format_cache_lock:
+        _format_cache.pop(video_id, None)
+
+
+def download_clip(url, start_time, end_time, output_title=None, output_dir=None):
+    """
+    Download a YouTube clip between start_time and end_time.
+
+    Args:
+        url: YouTube video URL
+        start_time: Start time (MM:SS or HH:MM:SS)
+        end_time: End time (MM:SS or HH:MM:SS)
+        output_title: Output filename without extension (defaults to "<video title>_clip")
+        output_dir: Directory to write the clip to (defaults to the current directory)
+
+    Returns:
+        Path of the downloaded .mp4, or None if the download failed
+    """
 
     # Convert timestamps to seconds
     start_sec = timestamp_to_seconds(start_time)
@@ -102,37 +203,228 @@ def download_clip(url, start_time, end_time, output_title=None):
 
     if start_sec >= end_sec:
         print("Error: Start time must be before end time")
-        return False
+        return None
 
     print(f"Downloading clip from {start_time} to {end_time}")
     print(f"Duration: {end_sec - start_sec} seconds\n")
 
-    # Configure output template
-    if output_title:
-        output_template = f'{output_title}.%(ext)s'
-    else:
-        output_template = '%(title)s_clip.%(ext)s'
+    # Cut from the locally cached episode source when that mode is enabled
+    from .media_cache import local_source_enabled, get_episode_source, release_episode_source
 
-    # Configure yt-dlp
-    ydl_opts = {
-        'format': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]/best',
-        'merge_output_format': 'mp4',
-        'download_ranges': download_range_func(None, [(start_sec, end_sec)]),
-        'force_keyframes_at_cuts': True,
-        'outtmpl': output_template,
-    }
+    video_id = extract_video_id(url)
+    source = None
+    if video_id and local_source_enabled():
+        try:
+            source = get_episode_source(video_id)
+        except Exception as e:
+            print(f"\nCaching episode source failed: {e}")
+            print("Falling back to remote download...")
 
-    # Download the clip
+    # Configure output path
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        if output_title:
+            title = output_title
+        elif video_id:
+            title = f"{get_video_formats(video_id)['info'].get('title', video_id)}_clip"
+        else:
+            title = "clip"
+        output_path = os.path.join(output_dir or '.', f"{safe_filename(title)}.mp4")
+
+        # Download the clip
+        fetch_clip(url, start_sec, end_sec, output_path, source=source)
 
         print("\nDownload complete!")
-        return True
+        return output_path
 
     except Exception as e:
         print(f"\nDownload failed: {e}")
-        return False
+        return None
+    finally:
+        if source:
+            release_episode_source(source)
+
+
+def download_clips(url, ranges, max_workers: int = CLIP_DOWNLOAD_WORKERS, output_dir=None) -> List[Dict]:
+    """
+    Download several clips from the same YouTube video.
+
+    The video is extracted once and the ranges are then downloaded concurrently,
+    each to its own deterministic output file.
+
+    Args:
+        url: YouTube video URL
+        ranges: List of (start_time, end_time, output_title) tuples. output_title may
+            be None, in which case "<video_id>_clip_<NN>" is used (NN = 1-based index)
+        max_workers: Number of ranges downloaded in parallel
+        output_dir: Directory to write the clips to (defaults to the current directory)
+
+    Returns:
+        List of per-range results, in the same order as ranges:
+        {
+            "start": str,
+            "end": str,
+            "output_path": str,
+            "success": bool,
+            "error": str (only if success=False)
+        }
+    """
+    from .media_cache import local_source_enabled, get_episode_source, release_episode_source
+
+    video_id = extract_video_id(url)
+
+    # Warm the format cache so every range reuses the same extraction
+    if video_id:
+        get_video_formats(video_id)
+
+    # In local mode the episode is downloaded once and every range is cut from it
+    source = None
+    if video_id and local_source_enabled():
+        try:
+            source = get_episode_source(video_id)
+        except Exception as e:
+            print(f"⚠  Could not cache episode source, downloading ranges remotely: {e}")
+
+    def download_range(index, start_time, end_time, output_title):
+        title = output_title or f"{video_id or 'clip'}_clip_{index + 1:02d}"
+        result = {
+            "start": start_time,
+            "end": end_time,
+            "output_path": os.path.join(output_dir or '.', f"{safe_filename(title)}.mp4"),
+            "success": False,
+        }
+        try:
+            start_sec = timestamp_to_seconds(start_time)
+            end_sec = timestamp_to_seconds(end_time)
+            if start_sec >= end_sec:
+                raise ValueError("Start time must be before end time")
+
+            fetch_clip(url, start_sec, end_sec, result["output_path"], source=source, quiet=True)
+
+            result["success"] = True
+            print(f"✓ [{index + 1}/{len(ranges)}] {start_time}-{end_time} -> {result['output_path']}")
+        except Exception as e:
+            result["error"] = str(e)
+            print(f"✗ [{index + 1}/{len(ranges)}] {start_time}-{end_time} failed: {e}")
+        return result
+
+    print(f"Downloading {len(ranges)} clips ({max_workers} in parallel)")
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(download_range, index, start_time, end_time, output_title)
+                for index, (start_time, end_time, output_title) in enumerate(ranges)
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        if source:
+            release_episode_source(source)
+
+    succeeded = sum(1 for result in results if result["success"])
+    print(f"\nDownloaded {succeeded}/{len(results)} clips")
+    return results
+
+
+def stream_clip(url, start_time, end_time) -> Iterator[bytes]:
+    """
+    Mux a clip as fragmented MP4 and yield it in chunks, without writing it to disk.
+
+    The clip is read from the locally cached episode source when that mode is
+    enabled, otherwise straight from the cached YouTube stream URLs. Because the
+    output is not seekable, boundaries are re-encoded rather than smart-cut
+    (stream copy is kept with CLIP_CUT_MODE=copy).
+
+    Raises:
+        RuntimeError: If ffmpeg fails (raised from the iterator, after the last chunk)
+    """
+    from .media_cache import local_source_enabled, get_episode_source, release_episode_source
+    from .smart_cut import CLIP_CUT_MODE
+
+    start_sec = timestamp_to_seconds(start_time)
+    end_sec = timestamp_to_seconds(end_time)
+    if start_sec >= end_sec:
+        raise ValueError("Start time must be before end time")
+
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise ValueError(f"Invalid YouTube URL: {url}")
+
+    source = None
+    if local_source_enabled():
+        source = get_episode_source(video_id)
+        inputs = [source]
+    else:
+        info = get_video_formats(video_id)["info"]
+        inputs = [fmt['url'] for fmt in info.get('requested_formats') or [info]]
+
+    command = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+    for input_url in inputs:
+        command += ['-ss', str(start_sec), '-to', str(end_sec), '-i', input_url]
+
+    audio_input = len(inputs) - 1
+    command += ['-map', '0:v:0', '-map', f'{audio_input}:a:0?']
+    if CLIP_CUT_MODE == "copy":
+        command += ['-c:v', 'copy']
+    else:
+        command += ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18']
+    command += [
+        '-c:a', 'aac', '-b:a', '192k',
+        '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+        '-f', 'mp4', 'pipe:1',
+    ]
+
+    print(f"Streaming clip from {start_time} to {end_time}")
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+    except Exception:
+        stderr_file.close()
+        if source:
+            release_episode_source(source)
+        raise
+
+    # Read ffmpeg's output on a separate thread into a bounded buffer, so the
+    # muxer keeps running through short network stalls without unbounded memory
+    buffer = queue.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+    stopped = threading.Event()
+
+    def read_output():
+        while not stopped.is_set():
+            chunk = process.stdout.read(STREAM_CHUNK_SIZE)
+            while not stopped.is_set():
+                try:
+                    buffer.put(chunk, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            if not chunk:
+                return
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    total_bytes = 0
+    try:
+        while True:
+            chunk = buffer.get()
+            if not chunk:
+                break
+            total_bytes += len(chunk)
+            yield chunk
+
+        if process.wait() != 0:
+            stderr_file.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {stderr_file.read().decode(errors='replace').strip()}")
+
+        print(f"✓ Streamed {total_bytes / (1024*1024):.2f} MB")
+    finally:
+        stopped.set()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        stderr_file.close()
+        if source:
+            release_episode_source(source)
 
 
 """
@@ -175,6 +467,147 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+def fetch_clip(url, start_sec, end_sec, output_path, source=None, quiet=False):
+    """
+    Produce one .mp4 clip at output_path for the range [start_sec, end_sec).
+
+    Cuts from a local episode source when one is given, otherwise fetches the
+    range from YouTube. With CLIP_CUT_MODE=smart, remote ranges are fetched
+    keyframe-aligned without re-encoding and then smart-cut locally.
+    """
+    from .media_cache import cut_clip
+    from .smart_cut import CLIP_CUT_MODE, smart_cut_enabled
+
+    if source:
+        try:
+            cut_clip(source, start_sec, end_sec, output_path)
+            return
+        except Exception as e:
+            print(f"⚠  Cutting from local source failed ({e}), falling back to remote download")
+
+    if smart_cut_enabled() and extract_video_id(url):
+        try:
+            download_smart_cut(url, start_sec, end_sec, output_path, quiet=quiet)
+            return
+        except Exception as e:
+            print(f"⚠  Smart cut failed ({e}), re-encoding the whole clip instead")
+
+    # yt-dlp treats % in the template as a field marker
+    output_template = os.path.splitext(output_path)[0].replace('%', '%%') + '.%(ext)s'
+    ydl_opts = clip_download_options(start_sec, end_sec, output_template,
+                                     force_keyframes=CLIP_CUT_MODE != "copy")
+    if quiet:
+        ydl_opts.update({'quiet': True, 'noprogress': True})
+    download_with_cached_formats(url, ydl_opts)
+
+    if not os.path.exists(output_path):
+        raise RuntimeError(f"Clip was not produced at {output_path}")
+
+
+def download_smart_cut(url, start_sec, end_sec, output_path, quiet=False):
+    """
+    Fetch a remote range without re-encoding and smart-cut it to exact bounds.
+
+    Keyframes are probed on the remote video stream so the fetched section
+    starts and ends on keyframes, which keeps the stream-copied section's
+    timeline aligned with the source. The clip bounds are then mapped onto
+    the fetched file's own timeline, using the first timestamp it actually
+    starts at rather than assuming it starts at 0.
+    """
+    from .smart_cut import KEYFRAME_SEARCH_WINDOW, probe_keyframes, probe_start_time, smart_cut
+
+    entry = get_video_formats(extract_video_id(url))
+    selected = entry["info"].get('requested_formats') or [entry["info"]]
+    video_url = next((fmt['url'] for fmt in selected if fmt.get('vcodec') != 'none' and fmt.get('url')), None)
+    if not video_url:
+        raise RuntimeError("No video stream URL available")
+
+    keyframes = probe_keyframes(video_url, start_sec, end_sec)
+    section_start = max((k for k in keyframes if k <= start_sec), default=None)
+    if section_start is None:
+        raise RuntimeError("No keyframe found before clip start")
+    section_end = min((k for k in keyframes if k >= end_sec), default=end_sec + KEYFRAME_SEARCH_WINDOW)
+
+    work_dir = tempfile.mkdtemp(prefix='.section-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        ydl_opts = clip_download_options(section_start, section_end,
+                                         os.path.join(work_dir, 'section.%(ext)s'),
+                                         force_keyframes=False)
+        if quiet:
+            ydl_opts.update({'quiet': True, 'noprogress': True})
+        download_with_cached_formats(url, ydl_opts)
+
+        section_path = os.path.join(work_dir, 'section.mp4')
+        offset = probe_start_time(section_path) - section_start
+        smart_cut(section_path, start_sec + offset, end_sec + offset, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def clip_download_options(start_sec, end_sec, output_template, force_keyframes=True) -> Dict:
+    """Build the yt-dlp options for downloading one clip range."""
+    return {
+        'format': CLIP_FORMAT,
+        'merge_output_format': 'mp4',
+        'download_ranges': download_range_func(None, [(start_sec, end_sec)]),
+        'force_keyframes_at_cuts': force_keyframes,
+        'outtmpl': output_template,
+    }
+
+
+def download_with_cached_formats(url, ydl_opts):
+    """
+    Run a yt-dlp download, reusing cached format metadata for the video.
+
+    If a download from a cached entry fails, the entry is dropped and the
+    download is retried once with freshly extracted formats. The failure is not
+    matched on its message: ranged downloads go through ffmpeg, which reports a
+    rejected (403) or expired stream URL only as "ffmpeg exited with code N".
+    """
+    video_id = extract_video_id(url)
+
+    if not video_id:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([url])
+        return
+
+    started = time.time()
+    entry = get_video_formats(video_id)
+    if stream_urls_expiry(entry["stream_urls"]) <= time.time():
+        entry = get_video_formats(video_id, refresh=True)
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.process_ie_result(copy.deepcopy(entry["info"]), download=True)
+    except DownloadError as e:
+        if entry["extracted_at"] >= started:
+            # The formats were extracted for this download, so they are not stale
+            raise
+        print(f"⚠ Download from cached formats failed ({e}), re-extracting formats...")
+        invalidate_video_formats(video_id)
+        entry = get_video_formats(video_id, refresh=True)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.process_ie_result(copy.deepcopy(entry["info"]), download=True)
+
+
+def stream_urls_expiry(stream_urls: List[str]) -> float:
+    """Return the earliest expiry (unix time) encoded in a list of stream URLs."""
+    expiries = []
+    for stream_url in stream_urls:
+        expire = parse_qs(urlparse(stream_url).query).get('expire')
+        if expire and expire[0].isdigit():
+            expiries.append(float(expire[0]))
+
+    if not expiries:
+        return time.time() + FORMAT_CACHE_DEFAULT_TTL
+    return min(expiries)
+
+
+def safe_filename(title: str) -> str:
+    """Make a clip title safe to use as a filename."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', '_', title).strip() or "clip"
+
+
 def timestamp_to_seconds(timestamp):
     """Convert MM:SS or HH:MM:SS to seconds."""
     parts = timestamp.split(':')
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Batch Publisher
+Publishes many YouTube Shorts and Instagram Reels without prompts, from a
+manifest or a directory scan. Progress is recorded in a state file, so a rerun
+skips everything already published.
+
+Usage:
+    python batch_publisher.py <manifest.json | directory> [--workers N]
+                              [--youtube-limit N] [--instagram-limit N]
+                              [--platforms youtube,instagram] [--state FILE]
+                              [--fix-media]
+
+Manifest (JSON list, paths relative to the manifest):
+    [{"video": "clip1.mp4", "title": "...", "caption": "...",
+      "thumbnail": "clip1.png", "platforms": ["youtube", "instagram"]}]
+
+Directory scan: every <name>.mp4, with caption from <name>.txt, thumbnail from
+<name>.png and title from <name>.title (or the file name)
+"""
+
+import os
+import sys
+import json
+import queue
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import youtube_quota
+from main import PlatformOutput
+
+PLATFORMS = ['youtube', 'instagram']
+STATE_FILE_NAME = '.publish_state.json'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Publish many videos to YouTube Shorts and Instagram Reels.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+            Examples:
+            python batch_publisher.py videos/
+            python batch_publisher.py week12.json --workers 4 --youtube-limit 2
+                    '''
+    )
+    parser.add_argument('source', help='Manifest JSON file or directory of videos')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Upper bound on the uploads run at once per platform (default: 2)')
+    parser.add_argument('--youtube-limit', type=int, default=1,
+                        help='YouTube uploads run at once (default: 1)')
+    parser.add_argument('--instagram-limit', type=int, default=1,
+                        help='Instagram uploads prepared at once; they share one login and '
+                             'send to Instagram one at a time (default: 1)')
+    parser.add_argument('--platforms', default=','.join(PLATFORMS),
+                        help='Platforms for items that do not list their own (default: youtube,instagram)')
+    parser.add_argument('--state', default=None,
+                        help=f'State file (default: {STATE_FILE_NAME} next to the source)')
+    parser.add_argument('--fix-media', action='store_true',
+                        help='Transcode videos that break a platform\'s specs instead of failing them')
+    args = parser.parse_args()
+
+    default_platforms = [p.strip() for p in args.platforms.split(',') if p.strip()]
+    unknown = set(default_platforms) - set(PLATFORMS)
+    if unknown:
+        print(f"✗ Unknown platform(s): {', '.join(sorted(unknown))}")
+        sys.exit(1)
+
+    source = Path(args.source)
+    if source.is_dir():
+        items = scan_directory(source, default_platforms)
+        base_dir = source
+    elif source.is_file():
+        items = load_manifest(source, default_platforms)
+        base_dir = source.parent
+    else:
+        print(f"✗ Not found: {source}")
+        sys.exit(1)
+
+    state = PublishState(args.state or str(base_dir / STATE_FILE_NAME))
+    limits = {'youtube': args.youtube_limit, 'instagram': args.instagram_limit}
+
+    results = publish_batch(items, state, args.workers, limits, args.fix_media)
+    sys.exit(0 if all(results.values()) else 1)
+
+
+def publish_batch(items, state, workers, limits, fix_media=False):
+    """Publish every (item, platform) pair not yet published
+
+    Each platform runs its pairs on its own pool of threads and logged-in
+    uploaders, `limits[platform]` in size (at most `workers`), so no platform
+    runs more uploads at once than its limit, and YouTube uploads waiting for
+    the daily quota to reset never hold up Instagram. With fix_media, videos that break a
+    platform's specs are transcoded (once per file) instead of failed.
+
+    Returns:
+        {(item key, platform): success} for the pairs attempted in this run
+    """
+    tasks = []
+    skipped = 0
+    for item in items:
+        for platform in item['platforms']:
+            if state.is_published(item['key'], platform):
+                skipped += 1
+            else:
+                tasks.append((item, platform))
+
+    print(f"{len(items)} item(s): {len(tasks)} upload(s) to run, {skipped} already published\n")
+    if not tasks:
+        return {}
+
+    youtube_tasks = [item for item, platform in tasks if platform == 'youtube']
+    if youtube_tasks:
+        report_quota(youtube_tasks)
+
+    uploaders = {platform: UploaderPool(platform, limits.get(platform, 1)) for platform in PLATFORMS}
+    output = PlatformOutput(sys.stdout)
+    sys.stdout = output
+
+    def run(item, platform):
+        output.set_platform(f"{platform}:{item['name']}")
+        try:
+            result = publish_item(item, platform, uploaders[platform], fix_media)
+        except Exception as e:
+            print(f"✗ {platform} upload error: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+        finally:
+            output.set_platform(None)
+        state.record(item['key'], platform, result)
+        return result['status'] == 'published'
+
+    # One executor per platform: a YouTube upload held until the quota resets
+    # (possibly for hours) only occupies a YouTube worker, never an Instagram one
+    executors = {platform: ThreadPoolExecutor(max_workers=max(1, min(workers, limits.get(platform, 1))),
+                                              thread_name_prefix=f'publish-{platform}')
+                 for platform in PLATFORMS}
+    try:
+        futures = {(item['key'], platform): executors[platform].submit(run, item, platform)
+                   for item, platform in tasks}
+        results = {key: future.result() for key, future in futures.items()}
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+        sys.stdout = output.stream
+
+    # Summary
+    print("\n" + "="*60)
+    print("BATCH SUMMARY")
+    print("="*60)
+    for platform in PLATFORMS:
+        attempted = [ok for (_, p), ok in results.items() if p == platform]
+        if attempted:
+            print(f"{platform + ':':<11}{sum(attempted)}/{len(attempted)} published")
+    print(f"Skipped (already published): {skipped}")
+    print(f"State saved to: {state.path}")
+    print("="*60)
+
+    failed = [key for key, ok in results.items() if not ok]
+    if failed:
+        print(f"\n⚠ {len(failed)} upload(s) failed; rerun to retry them:")
+        for item_key, platform in failed:
+            print(f"  - {item_key} ({platform}): {state.error(item_key, platform)}")
+    else:
+        print("\n✓ All uploads completed successfully!")
+
+    return results
+
+
+def report_quota(items):
+    """Warn when the YouTube uploads of a batch do not fit in today's remaining quota"""
+    needed = sum(youtube_quota.quota_cost(['videos.insert'] + (['thumbnails.set'] if item['thumbnail'] else []))
+                 for item in items)
+    left = youtube_quota.remaining()
+    if needed > left:
+        print(f"⚠ YouTube uploads need {needed} quota units, {left} left today")
+        print(f"  Uploads beyond today's quota are held until it resets at "
+              f"{youtube_quota.next_reset():%Y-%m-%d %H:%M %Z}\n")
+
+
+def publish_item(item, platform, uploaders, fix_media=False):
+    """Publish one item to one platform
+
+    Returns:
+        State entry: {"status": "published", "id": str, "url": str} or {"status": "failed", "error": str}
+    """
+    with uploaders.get() as uploader:
+        if platform == 'youtube':
+            response = uploader.upload_video(
+                video_path=item['video'],
+                title=item['title'],
+                description=item['caption'],
+                thumbnail_path=item['thumbnail'],
+                fix_media=fix_media
+            )
+            if response is None:
+                return {'status': 'failed', 'error': 'YouTube upload failed'}
+            return {'status': 'published', 'id': response['id'],
+                    'url': f"https://www.youtube.com/shorts/{response['id']}"}
+
+        media = uploader.upload_reel(
+            video_path=item['video'],
+            caption=item['caption'],
+            thumbnail_path=item['thumbnail'],
+            fix_media=fix_media
+        )
+        if media is None:
+            return {'status': 'failed', 'error': 'Instagram upload failed'}
+        return {'status': 'published', 'id': str(media.id),
+                'url': f"https://www.instagram.com/reel/{media.code}/"}
+
+
+class UploaderPool:
+    """Logged-in uploaders of one platform; taking one also takes one of the platform's concurrency slots"""
+
+    def __init__(self, platform, size):
+        self.platform = platform
+        self.size = max(1, size)
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(self.size)
+        self.login_error = None
+
+    def get(self):
+        return PooledUploader(self)
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            return self.create()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, uploader):
+        self.idle.put(uploader)
+        self.slots.release()
+
+    def create(self):
+        """Create and log in a new uploader (fails fast once a login has failed)"""
+        with self.lock:
+            if self.login_error:
+                raise RuntimeError(self.login_error)
+
+        if self.platform == 'youtube':
+            from youtube_shorts_publisher import YouTubeShortsUploader
+            # Uploads beyond today's quota wait for the next quota day
+            uploader = YouTubeShortsUploader(wait_for_quota=True)
+            logged_in = uploader.authenticate()
+        else:
+            # Every Instagram slot shares the process-wide logged-in client: a second
+            # login of the same account risks a challenge. The client sends one upload
+            # at a time; the slots overlap the media checks and --fix-media transcoding
+            from instagram_reel_publisher import shared_uploader
+            uploader = shared_uploader()
+            logged_in = uploader is not None
+
+        if not logged_in:
+            with self.lock:
+                self.login_error = f"{self.platform} authentication failed"
+            raise RuntimeError(self.login_error)
+
+        return uploader
+
+
+class PooledUploader:
+    """Context manager lending an uploader from an UploaderPool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.uploader = None
+
+    def __enter__(self):
+        self.uploader = self.pool.acquire()
+        return self.uploader
+
+    def __exit__(self, *exc):
+        self.pool.release(self.uploader)
+        return False
+
+
+class PublishState:
+    """Per-item, per-platform publish results, saved to a JSON file after every upload"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.items = {}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.items = json.load(f)
+            print(f"✓ Loaded state from: {path}")
+
+    def is_published(self, item_key, platform):
+        with self.lock:
+            return self.items.get(item_key, {}).get(platform, {}).get('status') == 'published'
+
+    def error(self, item_key, platform):
+        with self.lock:
+            return self.items.get(item_key, {}).get(platform, {}).get('error')
+
+    def record(self, item_key, platform, result):
+        with self.lock:
+            entry = dict(result, updated_at=datetime.now(timezone.utc).isoformat())
+            self.items.setdefault(item_key, {})[platform] = entry
+            self.save()
+
+    def save(self):
+        """Write the state file atomically (caller holds the lock)"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.publish_state-', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.items, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def scan_directory(directory, default_platforms):
+    """Build items from every .mp4 in a directory"""
+    items = []
+    for video in sorted(directory.glob('*.mp4')):
+        title_file = video.with_suffix('.title')
+        title = read_text(title_file) if title_file.exists() else video.stem.replace('_', ' ')
+        items.append(make_item(
+            directory,
+            video=video,
+            title=title,
+            caption=read_text(video.with_suffix('.txt')),
+            thumbnail=video.with_suffix('.png'),
+            platforms=default_platforms,
+        ))
+    print(f"✓ Found {len(items)} video(s) in {directory}")
+    return items
+
+
+def load_manifest(manifest_path, default_platforms):
+    """Build items from a manifest file"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    base_dir = manifest_path.parent
+    items = []
+    for entry in entries:
+        caption = entry.get('caption')
+        if caption is None and entry.get('caption_file'):
+            caption = read_text(base_dir / entry['caption_file'])
+        video = base_dir / entry['video']
+        items.append(make_item(
+            base_dir,
+            video=video,
+            title=entry.get('title') or video.stem.replace('_', ' '),
+            caption=caption or "",
+            thumbnail=base_dir / entry['thumbnail'] if entry.get('thumbnail') else None,
+            platforms=entry.get('platforms') or default_platforms,
+        ))
+    print(f"✓ Loaded {len(items)} item(s) from {manifest_path}")
+    return items
+
+
+def make_item(base_dir, video, title, caption, thumbnail, platforms):
+    """Normalize an item; the key (video path relative to the source) identifies it in the state file"""
+    return {
+        'key': os.path.relpath(video, base_dir),
+        'name': video.stem,
+        'video': str(video),
+        'title': title,
+        'caption': caption,
+        'thumbnail': str(thumbnail) if thumbnail and os.path.exists(thumbnail) else None,
+        'platforms': [platform for platform in platforms if platform in PLATFORMS],
+    }
+
+
+def read_text(path):
+    """Read a text file, or return "" if it does not exist"""
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+if __name__ == "__main__":
+    main()
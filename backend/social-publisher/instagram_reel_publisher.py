@@ -1,11 +1,14 @@
 import os
 import sys
+import tempfile
+import threading
 from pathlib import Path
 from instagrapi import Client
 from instagrapi.exceptions import LoginRequired, ChallengeRequired, PleaseWaitFewMinutes
 from dotenv import load_dotenv
 import json
 import logging
+from media_preflight import check_video, fix_video
 
 # Load environment variables
 load_dotenv()
@@ -16,9 +19,15 @@ SCRIPT_DIR = Path(__file__).parent.absolute()
 # Constants
 SESSION_FILE = str(SCRIPT_DIR / 'session.json')
 
+# Logged-in uploader shared by all uploads of the process (see shared_uploader)
+_shared_uploader = None
+_shared_lock = threading.Lock()
+
 class InstagramReelsUploader:
     def __init__(self, debug=False):
         self.client = Client()
+        # The instagrapi client is not thread-safe; uploads sharing it send one at a time
+        self.upload_lock = threading.Lock()
         self.username = os.getenv("INSTAGRAM_USERNAME")
         self.password = os.getenv("INSTAGRAM_PASSWORD")
 
@@ -31,27 +40,58 @@ class InstagramReelsUploader:
             self.client.logger.setLevel(logging.DEBUG)
     
     def login(self):
-        """Login to Instagram with session persistence"""
+        """Login to Instagram with session persistence
+
+        A saved session is reused if a cheap authenticated call succeeds with
+        it; a full login only happens when there is no session or Instagram
+        reports it as logged out. If the check is rate limited, challenged or
+        fails otherwise, the session is kept and login fails, so the upload can
+        be retried later without a new login that could get the account flagged.
+        """
         print(f"Logging in as {self.username}...")
         
-        # Try to load existing session
+        # Try to reuse the saved session
         if os.path.exists(SESSION_FILE):
             try:
                 print("Loading saved session...")
                 self.client.load_settings(SESSION_FILE)
-                self.client.login(self.username, self.password)
-                print("✓ Logged in using saved session")
-                return True
             except Exception as e:
-                print(f"Saved session failed: {e}")
-                print("Logging in fresh...")
+                print(f"Saved session could not be loaded: {e}")
+            else:
+                try:
+                    valid = self.session_is_valid()
+                except ChallengeRequired:
+                    print("⚠ Instagram requires verification (Challenge) for the saved session")
+                    print("Please complete the challenge on Instagram app/website, then try again")
+                    return False
+                except PleaseWaitFewMinutes:
+                    print("⚠ Instagram is rate limiting. Keeping the saved session; wait a few minutes and try again")
+                    return False
+                except Exception as e:
+                    print(f"✗ Could not check the saved session: {e}")
+                    print("Keeping the saved session; try again later")
+                    return False
+
+                if valid:
+                    # Save refreshed cookies
+                    self.save_session()
+                    print("✓ Logged in using saved session")
+                    return True
+
+                print("Saved session expired")
+                # Log in again on the same device, so Instagram does not see a new login from a new device
+                uuids = self.client.get_settings().get("uuids")
+                self.client.set_settings({})
+                if uuids:
+                    self.client.set_uuids(uuids)
+            print("Logging in fresh...")
         
         # Fresh login
         try:
             self.client.login(self.username, self.password)
             
             # Save session for next time
-            self.client.dump_settings(SESSION_FILE)
+            self.save_session()
             print("✓ Logged in successfully and session saved")
             return True
             
@@ -67,6 +107,29 @@ class InstagramReelsUploader:
         except Exception as e:
             print(f"✗ Login failed: {e}")
             return False
+
+    def session_is_valid(self):
+        """Check the loaded session with a cheap authenticated call
+
+        Returns:
+            True if the session works, False if Instagram logged it out (LoginRequired)
+
+        Raises:
+            Any other error of the call (rate limit, challenge, network); the
+            session may still be good, so it must not be replaced by a new login
+        """
+        try:
+            self.client.account_info()
+            return True
+        except LoginRequired:
+            return False
+
+    def save_session(self):
+        """Write the session to SESSION_FILE atomically"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.session-', dir=str(SCRIPT_DIR))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.client.get_settings(), f, indent=4)
+        os.replace(tmp_path, SESSION_FILE)
     
     def validate_video(self, video_path):
         """Validate video meets Instagram Reels requirements"""
@@ -91,22 +154,29 @@ class InstagramReelsUploader:
         else:
             print(f"✓ File size: {file_size_mb:.2f} MB")
         
+        # Check the streams against the platform specs (ffprobe)
+        if not check_video(video_path, 'instagram'):
+            return False
+        
         print("✓ Video validation passed")
         return True
     
-    def upload_reel(self, video_path, caption="", thumbnail_path=None):
+    def upload_reel(self, video_path, caption="", thumbnail_path=None, fix_media=False):
         """Upload video as Instagram Reel with optional thumbnail
 
         Args:
             video_path: Path to the video file to upload
             caption: Caption text for the reel
             thumbnail_path: Optional path to thumbnail image (JPG/PNG)
+            fix_media: Transcode the video first if it breaks the Reels specs
         """
         print(f"\n{'='*50}")
         print(f"Uploading Reel...")
         print(f"{'='*50}")
 
         # Validate video first
+        if fix_media and os.path.exists(video_path):
+            video_path = fix_video(video_path, 'instagram')
         if not self.validate_video(video_path):
             return None
 
@@ -119,35 +189,52 @@ class InstagramReelsUploader:
             else:
                 print(f"✓ Using thumbnail: {thumbnail_path}")
 
-        try:
-            # Upload the reel
-            print("\nUploading to Instagram...")
-            media = self.client.clip_upload(
-                video_path,
-                caption=caption,
-                thumbnail=thumbnail_path
-            )
-
-            print("\n" + "="*50)
-            print("✓ SUCCESS! Reel uploaded")
-            print("="*50)
-            print(f"Media ID: {media.id}")
-            print(f"Media Code: {media.code}")
-            print(f"URL: https://www.instagram.com/reel/{media.code}/")
-            print(f"Caption: {caption[:50]}..." if len(caption) > 50 else f"Caption: {caption}")
-            if thumbnail_path:
-                print(f"Thumbnail: {thumbnail_path}")
-
-            return media
-
-        except Exception as e:
-            print(f"\n✗ Upload failed: {e}")
+        with self.upload_lock:
+            try:
+                # Upload the reel
+                print("\nUploading to Instagram...")
+                media = self.client.clip_upload(
+                    video_path,
+                    caption=caption,
+                    thumbnail=thumbnail_path
+                )
 
-            # Print the last API response for debugging
-            if hasattr(self.client, 'last_json') and self.client.last_json:
                 print("\n" + "="*50)
-                print("Last Instagram API Response:")
+                print("✓ SUCCESS! Reel uploaded")
                 print("="*50)
-                print(json.dumps(self.client.last_json, indent=2))
+                print(f"Media ID: {media.id}")
+                print(f"Media Code: {media.code}")
+                print(f"URL: https://www.instagram.com/reel/{media.code}/")
+                print(f"Caption: {caption[:50]}..." if len(caption) > 50 else f"Caption: {caption}")
+                if thumbnail_path:
+                    print(f"Thumbnail: {thumbnail_path}")
+
+                return media
+
+            except Exception as e:
+                print(f"\n✗ Upload failed: {e}")
+
+                # Print the last API response for debugging
+                if hasattr(self.client, 'last_json') and self.client.last_json:
+                    print("\n" + "="*50)
+                    print("Last Instagram API Response:")
+                    print("="*50)
+                    print(json.dumps(self.client.last_json, indent=2))
+
+                return None
+
+
+def shared_uploader():
+    """Get the process-wide logged-in uploader, logging in on first use
 
-            return None
\ No newline at end of file
+    Returns:
+        The uploader, or None if login failed
+    """
+    global _shared_uploader
+    with _shared_lock:
+        if _shared_uploader is None:
+            uploader = InstagramReelsUploader(debug=False)
+            if not uploader.login():
+                return None
+            _shared_uploader = uploader
+        return _shared_uploader
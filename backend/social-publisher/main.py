@@ -6,11 +6,14 @@ Publishes YouTube Shorts and Instagram Reels
 
 import os
 import sys
+import time
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the individual uploaders
 from youtube_shorts_publisher import YouTubeShortsUploader
-from instagram_reel_publisher import InstagramReelsUploader
+from instagram_reel_publisher import shared_uploader
 
 
 def main():
@@ -89,117 +92,209 @@ def main():
     publish_youtube = choice in ['1', '2', '']
     publish_instagram = choice in ['1', '3', '']
 
-    results = {
-        'youtube': None,
-        'instagram': None
-    }
+    # Videos that break a platform's specs are rejected before upload unless fixed
+    fix_media = input("Transcode the video if it breaks platform specs? (y/N): ").strip().lower() == 'y'
 
-    # ========== PUBLISH TO YOUTUBE ==========
+    publishers = {}
     if publish_youtube:
-        print("\n" + "="*60)
-        print("PUBLISHING TO YOUTUBE")
-        print("="*60)
+        publishers['YouTube'] = lambda: publish_to_youtube(
+            video_path, title, text_content, thumbnail_path if thumbnail_exists else None, fix_media)
+    if publish_instagram:
+        publishers['Instagram'] = lambda: publish_to_instagram(
+            video_path, text_content, thumbnail_path if thumbnail_exists else None, fix_media)
 
-        try:
-            # Initialize YouTube uploader
-            youtube_uploader = YouTubeShortsUploader()
-
-            # Authenticate
-            if not youtube_uploader.authenticate():
-                print("✗ YouTube authentication failed")
-                results['youtube'] = False
-            else:
-                # Upload to YouTube
-                result = youtube_uploader.upload_video(
-                    video_path=video_path,
-                    title=title,
-                    description=text_content,
-                    thumbnail_path=thumbnail_path if thumbnail_exists else None
-                )
-
-                results['youtube'] = result is not None
-
-                if results['youtube']:
-                    print("✓ YouTube upload successful!")
-                else:
-                    print("✗ YouTube upload failed")
+    # ========== PUBLISH (platforms run concurrently) ==========
+    results = run_publishers(publishers)
 
-        except Exception as e:
-            print(f"✗ YouTube upload error: {e}")
-            results['youtube'] = False
+    print_summary(results)
 
-    # ========== PUBLISH TO INSTAGRAM ==========
-    if publish_instagram:
-        print("\n" + "="*60)
-        print("PUBLISHING TO INSTAGRAM")
-        print("="*60)
 
+def publish_to_youtube(video_path, title, description, thumbnail_path=None, fix_media=False):
+    """Publish a video as a YouTube Short. Returns True on success."""
+    print("\n" + "="*60)
+    print("PUBLISHING TO YOUTUBE")
+    print("="*60)
+
+    try:
+        # Initialize YouTube uploader
+        youtube_uploader = YouTubeShortsUploader()
+
+        # Authenticate
+        if not youtube_uploader.authenticate():
+            print("✗ YouTube authentication failed")
+            return False
+
+        # Upload to YouTube
+        result = youtube_uploader.upload_video(
+            video_path=video_path,
+            title=title,
+            description=description,
+            thumbnail_path=thumbnail_path,
+            fix_media=fix_media
+        )
+
+        if result is not None:
+            print("✓ YouTube upload successful!")
+            return True
+
+        print("✗ YouTube upload failed")
+        return False
+
+    except Exception as e:
+        print(f"✗ YouTube upload error: {e}")
+        return False
+
+
+def publish_to_instagram(video_path, caption, thumbnail_path=None, fix_media=False):
+    """Publish a video as an Instagram Reel. Returns True on success."""
+    print("\n" + "="*60)
+    print("PUBLISHING TO INSTAGRAM")
+    print("="*60)
+
+    try:
+        # Logged-in uploader (reuses the saved session when it is still valid)
+        instagram_uploader = shared_uploader()
+        if not instagram_uploader:
+            print("✗ Instagram authentication failed")
+            return False
+
+        # Upload to Instagram
+        result = instagram_uploader.upload_reel(
+            video_path=video_path,
+            caption=caption,
+            thumbnail_path=thumbnail_path,
+            fix_media=fix_media
+        )
+
+        if result is not None:
+            print("✓ Instagram upload successful!")
+            return True
+
+        print("✗ Instagram upload failed")
+        return False
+
+    except ValueError as e:
+        print(f"✗ Instagram configuration error: {e}")
+        print("\nMake sure you have a .env file with:")
+        print("INSTAGRAM_USERNAME=your_username")
+        print("INSTAGRAM_PASSWORD=your_password")
+        return False
+    except Exception as e:
+        print(f"✗ Instagram upload error: {e}")
+        return False
+
+
+def run_publishers(publishers):
+    """Run platform publishers concurrently, one thread each
+
+    Output of each platform is prefixed with its name, and a failure (or crash)
+    of one platform does not affect the others.
+
+    Args:
+        publishers: {platform name: function returning True on success}
+
+    Returns:
+        {platform name: {"success": bool, "seconds": float}}
+    """
+    results = {}
+    output = PlatformOutput(sys.stdout)
+    sys.stdout = output
+    started = time.monotonic()
+
+    def run(platform, publish):
+        output.set_platform(platform)
+        platform_started = time.monotonic()
         try:
-            # Initialize Instagram uploader
-            instagram_uploader = InstagramReelsUploader(debug=False)
-
-            # Login
-            if not instagram_uploader.login():
-                print("✗ Instagram authentication failed")
-                results['instagram'] = False
-            else:
-                # Upload to Instagram
-                result = instagram_uploader.upload_reel(
-                    video_path=video_path,
-                    caption=text_content,
-                    thumbnail_path=thumbnail_path if thumbnail_exists else None
-                )
-
-                results['instagram'] = result is not None
-
-                if results['instagram']:
-                    print("✓ Instagram upload successful!")
-                else:
-                    print("✗ Instagram upload failed")
-
-        except ValueError as e:
-            print(f"✗ Instagram configuration error: {e}")
-            print("\nMake sure you have a .env file with:")
-            print("INSTAGRAM_USERNAME=your_username")
-            print("INSTAGRAM_PASSWORD=your_password")
-            results['instagram'] = False
+            success = bool(publish())
         except Exception as e:
-            print(f"✗ Instagram upload error: {e}")
-            results['instagram'] = False
-
-    # ========== SUMMARY ==========
+            print(f"✗ {platform} publisher crashed: {e}")
+            success = False
+        finally:
+            output.set_platform(None)
+        return {"success": success, "seconds": time.monotonic() - platform_started}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(publishers))) as executor:
+            futures = {platform: executor.submit(run, platform, publish)
+                       for platform, publish in publishers.items()}
+            for platform, future in futures.items():
+                results[platform] = future.result()
+    finally:
+        sys.stdout = output.stream
+
+    print(f"\nPublishing took {time.monotonic() - started:.1f}s")
+    return results
+
+
+def print_summary(results):
+    """Print the combined result of all platforms"""
     print("\n" + "="*60)
     print("PUBLISHING SUMMARY")
     print("="*60)
 
-    if publish_youtube:
-        youtube_status = "✓ SUCCESS" if results['youtube'] else "✗ FAILED"
-        print(f"YouTube:   {youtube_status}")
-
-    if publish_instagram:
-        instagram_status = "✓ SUCCESS" if results['instagram'] else "✗ FAILED"
-        print(f"Instagram: {instagram_status}")
+    for platform, result in results.items():
+        status = "✓ SUCCESS" if result["success"] else "✗ FAILED"
+        print(f"{platform + ':':<11}{status} ({result['seconds']:.1f}s)")
 
     print("="*60)
 
     # Overall result
-    if publish_youtube and publish_instagram:
-        if results['youtube'] and results['instagram']:
-            print("\n✓ All uploads completed successfully!")
-        elif results['youtube'] or results['instagram']:
-            print("\n⚠ Some uploads failed. Check the errors above.")
+    succeeded = [platform for platform, result in results.items() if result["success"]]
+    if len(results) == 1:
+        platform = next(iter(results))
+        if succeeded:
+            print(f"\n✓ {platform} upload completed successfully!")
         else:
-            print("\n✗ All uploads failed. Check the errors above.")
-    elif publish_youtube:
-        if results['youtube']:
-            print("\n✓ YouTube upload completed successfully!")
-        else:
-            print("\n✗ YouTube upload failed.")
-    elif publish_instagram:
-        if results['instagram']:
-            print("\n✓ Instagram upload completed successfully!")
-        else:
-            print("\n✗ Instagram upload failed.")
+            print(f"\n✗ {platform} upload failed.")
+    elif len(succeeded) == len(results):
+        print("\n✓ All uploads completed successfully!")
+    elif succeeded:
+        print("\n⚠ Some uploads failed. Check the errors above.")
+    else:
+        print("\n✗ All uploads failed. Check the errors above.")
+
+
+class PlatformOutput:
+    """stdout wrapper that prefixes each line with the platform of the thread writing it
+
+    Text is written as soon as it arrives, so prompts without a trailing newline
+    (2FA codes, the OAuth consent URL) are shown immediately. When another thread
+    writes while a line is unfinished, the open line is ended first and the
+    rest of it continues on a new prefixed line, so platforms never share a line.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Thread whose unfinished line is at the end of the stream, if any
+        self.open_line = None
+
+    def set_platform(self, platform):
+        """Set the prefix of the current thread (None removes it)"""
+        self.local.platform = platform
+
+    def write(self, text):
+        platform = getattr(self.local, 'platform', None)
+        prefix = f"[{platform}] " if platform else ""
+        thread = threading.get_ident()
+
+        with self.lock:
+            for piece in text.splitlines(keepends=True):
+                if self.open_line != thread:
+                    if self.open_line is not None:
+                        self.stream.write("\n")
+                    self.stream.write(prefix)
+                self.stream.write(piece)
+                self.open_line = None if piece.endswith("\n") else thread
+            self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+"""
+Media Preflight
+Checks a video against the YouTube Shorts and Instagram Reels specs with
+ffprobe before it is uploaded, and optionally fixes it with one transcode.
+Probe results are cached by file hash, so a file is probed once no matter how
+often (or under which name) it is published
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+# Get the directory where this script is located
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+CACHE_FILE = str(SCRIPT_DIR / 'probe_cache.json')
+FIXED_DIR = SCRIPT_DIR / '.preflight'
+
+# Platform limits
+YOUTUBE_SHORTS_MAX_DURATION = 180
+INSTAGRAM_REELS_MIN_DURATION = 3
+INSTAGRAM_REELS_MAX_DURATION = int(os.getenv("INSTAGRAM_REELS_MAX_DURATION", "900"))
+INSTAGRAM_MIN_FPS = 23
+INSTAGRAM_MAX_FPS = 60
+
+# Output of the fix-up transcode (meets both platforms' specs)
+TARGET_WIDTH = 1080
+TARGET_HEIGHT = 1920
+TARGET_FPS = 30
+
+_cache_lock = threading.Lock()
+_fix_locks = {}
+
+
+def check_video(video_path, platform):
+    """Check a video against a platform's specs, printing each problem
+
+    Args:
+        video_path: Path to the video file
+        platform: 'youtube' or 'instagram'
+
+    Returns:
+        True if the video meets the specs (or cannot be probed, e.g. without ffprobe)
+    """
+    info = probe(video_path)
+    if info is None:
+        return True
+
+    print(f"✓ Probed: {info['width']}x{info['height']}, {info['duration']:.1f}s, "
+          f"{info['video_codec']}/{info['audio_codec'] or 'no audio'}, {info['fps']:.2f} fps")
+
+    problems = spec_problems(info, platform)
+    for message, fixable in problems:
+        print(f"✗ {message}" + (" (fixable by transcoding)" if fixable else ""))
+    return not problems
+
+
+def fix_video(video_path, platform):
+    """Transcode a video that breaks fixable parts of a platform's specs
+
+    One pass re-encodes to H.264/AAC, 9:16 (padded, not cropped), yuv420p and a
+    supported frame rate. The result meets both platforms' specs and is reused
+    for later uploads of the same file. Duration problems are not fixed.
+
+    Returns:
+        Path to upload: the fixed file, or video_path if it needs no fixing (or cannot be fixed)
+    """
+    info = probe(video_path)
+    if info is None:
+        return video_path
+
+    problems = spec_problems(info, platform)
+    if not any(fixable for _, fixable in problems):
+        return video_path
+
+    output_path = FIXED_DIR / f"{info['sha256'][:16]}.mp4"
+    with _cache_lock:
+        lock = _fix_locks.setdefault(str(output_path), threading.Lock())
+
+    # Publishers running at once on the same file transcode it once
+    with lock:
+        if output_path.exists():
+            print(f"✓ Using fixed video: {output_path}")
+            return str(output_path)
+
+        print(f"Fixing video for {platform}: {', '.join(message for message, fixable in problems if fixable)}")
+        FIXED_DIR.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.mp4', dir=str(FIXED_DIR))
+        os.close(fd)
+        try:
+            run_ffmpeg(transcode_command(video_path, info, tmp_path))
+            os.replace(tmp_path, output_path)
+        except (OSError, RuntimeError) as e:
+            print(f"✗ Fix-up transcode failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return video_path
+
+    print(f"✓ Fixed video: {output_path}")
+    return str(output_path)
+
+
+def probe(video_path):
+    """Stream and format details of a video, cached by file hash
+
+    Returns:
+        Dict with sha256, width, height (as displayed), duration, video_codec,
+        audio_codec, fps and pix_fmt, or None if ffprobe is unavailable or fails
+    """
+    sha256 = file_sha256(video_path)
+    with _cache_lock:
+        cached = load_cache()['probes'].get(sha256)
+    if cached:
+        return cached
+
+    try:
+        result = run_ffmpeg([
+            'ffprobe', '-v', 'error',
+            '-show_entries', 'format=duration:stream=codec_type,codec_name,width,height,'
+                             'avg_frame_rate,pix_fmt:stream_tags=rotate:stream_side_data=rotation',
+            '-of', 'json',
+            video_path,
+        ])
+    except FileNotFoundError:
+        print("⚠ ffprobe not found, skipping media checks")
+        return None
+    except RuntimeError as e:
+        print(f"⚠ Could not probe video, skipping media checks: {e}")
+        return None
+
+    info = parse_probe(json.loads(result.stdout or '{}'))
+    info['sha256'] = sha256
+    with _cache_lock:
+        cache = load_cache()
+        cache['probes'][sha256] = info
+        save_cache(cache)
+    return info
+
+
+"""
+PRIVATE METHODS
+"""
+
+def spec_problems(info, platform):
+    """Spec violations of a probed video as (message, fixable) pairs"""
+    problems = []
+    width, height, duration = info['width'], info['height'], info['duration']
+
+    if platform == 'youtube':
+        if duration > YOUTUBE_SHORTS_MAX_DURATION:
+            problems.append((f"Too long for a Short: {duration:.1f}s (max {YOUTUBE_SHORTS_MAX_DURATION}s)", False))
+        if width > height:
+            problems.append((f"Horizontal video ({width}x{height}); Shorts must be vertical or square", True))
+        return problems
+
+    if duration < INSTAGRAM_REELS_MIN_DURATION:
+        problems.append((f"Too short for a Reel: {duration:.1f}s (min {INSTAGRAM_REELS_MIN_DURATION}s)", False))
+    if duration > INSTAGRAM_REELS_MAX_DURATION:
+        problems.append((f"Too long for a Reel: {duration:.1f}s (max {INSTAGRAM_REELS_MAX_DURATION}s)", False))
+    if not height or abs(width / height - 9 / 16) > 0.01:
+        problems.append((f"Aspect ratio is not 9:16 ({width}x{height})", True))
+    if info['video_codec'] != 'h264':
+        problems.append((f"Video codec {info['video_codec']} (must be h264)", True))
+    if info['audio_codec'] not in (None, 'aac'):
+        problems.append((f"Audio codec {info['audio_codec']} (must be aac)", True))
+    if not INSTAGRAM_MIN_FPS <= info['fps'] <= INSTAGRAM_MAX_FPS:
+        problems.append((f"Frame rate {info['fps']:.2f} fps (must be {INSTAGRAM_MIN_FPS}-{INSTAGRAM_MAX_FPS})", True))
+    if info['pix_fmt'] != 'yuv420p':
+        problems.append((f"Pixel format {info['pix_fmt']} (must be yuv420p)", True))
+    return problems
+
+
+def transcode_command(video_path, info, output_path):
+    """ffmpeg command of the fix-up transcode"""
+    filters = []
+    if not info['height'] or abs(info['width'] / info['height'] - 9 / 16) > 0.01:
+        filters += [
+            f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease",
+            f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
+            "setsar=1",
+        ]
+    if not INSTAGRAM_MIN_FPS <= info['fps'] <= INSTAGRAM_MAX_FPS:
+        filters.append(f"fps={TARGET_FPS}")
+
+    command = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', video_path,
+        '-map', '0:v:0', '-map', '0:a:0?',
+    ]
+    if filters:
+        command += ['-vf', ','.join(filters)]
+    return command + [
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k',
+        '-movflags', '+faststart',
+        output_path,
+    ]
+
+
+def parse_probe(data):
+    """Pick the fields the spec checks need out of ffprobe's JSON output"""
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), {})
+
+    width, height = video.get('width') or 0, video.get('height') or 0
+    rotation = video.get('tags', {}).get('rotate') or next(
+        (side_data['rotation'] for side_data in video.get('side_data_list', []) if 'rotation' in side_data), 0)
+    if abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    numerator, _, denominator = (video.get('avg_frame_rate') or '0/1').partition('/')
+    fps = float(numerator) / float(denominator) if float(denominator or 0) else 0.0
+
+    return {
+        'width': width,
+        'height': height,
+        'duration': float(data.get('format', {}).get('duration') or 0),
+        'video_codec': video.get('codec_name'),
+        'audio_codec': audio.get('codec_name'),
+        'fps': fps,
+        'pix_fmt': video.get('pix_fmt'),
+    }
+
+
+def file_sha256(video_path):
+    """SHA-256 of a file, remembered by path, size and modification time so it is hashed once"""
+    stat = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    with _cache_lock:
+        sha256 = load_cache()['hashes'].get(key)
+    if sha256:
+        return sha256
+
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    with _cache_lock:
+        cache = load_cache()
+        cache['hashes'][key] = sha256
+        save_cache(cache)
+    return sha256
+
+
+def run_ffmpeg(command):
+    """Run an ffmpeg/ffprobe command, raising with its stderr on failure"""
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{command[0]} failed: {result.stderr.strip()}")
+    return result
+
+
+def load_cache():
+    """Load the probe cache (caller holds _cache_lock)"""
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r') as f:
+                cache = json.load(f)
+            cache.setdefault('hashes', {})
+            cache.setdefault('probes', {})
+            return cache
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read {CACHE_FILE}: {e}")
+    return {'hashes': {}, 'probes': {}}
+
+
+def save_cache(cache):
+    """Write the probe cache atomically (caller holds _cache_lock)"""
+    fd, tmp_path = tempfile.mkstemp(prefix='.probe_cache-', dir=str(SCRIPT_DIR))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, CACHE_FILE)
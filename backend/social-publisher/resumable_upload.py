@@ -0,0 +1,221 @@
+"""
+Resumable Upload
+Chunked, retrying driver for Google API resumable media uploads. The upload
+session URI is saved as soon as it is created, so an interrupted upload continues
+where it stopped, even after a restart
+"""
+
+import os
+import json
+import time
+import fcntl
+import random
+import socket
+import tempfile
+import threading
+import http.client
+from pathlib import Path
+from contextlib import contextmanager
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Get the directory where this script is located
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+# Bytes sent per request (the API requires a multiple of 256 KB)
+UPLOAD_CHUNK_SIZE = int(os.getenv("YOUTUBE_UPLOAD_CHUNK_MB", "8")) * 1024 * 1024
+
+# Retries of a failing chunk before the upload gives up
+MAX_RETRIES = int(os.getenv("YOUTUBE_UPLOAD_MAX_RETRIES", "10"))
+MAX_RETRY_DELAY = 60
+
+# Network errors raised while a chunk is sent. Retriable HTTP statuses (5xx, 429)
+# and connection errors while the session is created are retried by next_chunk itself
+RETRIABLE_EXCEPTIONS = (
+    httplib2.HttpLib2Error, http.client.HTTPException,
+    ConnectionError, socket.timeout,
+)
+
+# Resumable session URIs of unfinished uploads, by file
+SESSIONS_FILE = str(SCRIPT_DIR / 'upload_sessions.json')
+SESSIONS_LOCK_FILE = SESSIONS_FILE + '.lock'
+
+# Serializes session updates between threads; the flock on SESSIONS_LOCK_FILE
+# serializes them between processes (main.py and batch_publisher.py share the file)
+_sessions_lock = threading.Lock()
+
+
+def execute_resumable(request, file_path):
+    """Run a resumable upload request to completion, one chunk at a time
+
+    Each chunk is retried by the client library (next_chunk num_retries) on
+    5xx and 429 responses; a chunk that fails with a network error is retried
+    here with exponential backoff and jitter, continuing from the bytes the
+    server confirmed. The session URI is saved as soon as the session is
+    created, before any bytes are sent, so if the process stops (even during
+    the first chunk) the next run of the same file continues where it stopped.
+
+    Args:
+        request: HttpRequest with a resumable MediaFileUpload body
+        file_path: Path of the uploaded file
+
+    Returns:
+        The API response of the finished upload
+
+    Raises:
+        HttpError: On a non-retriable error, or when retries are exhausted
+    """
+    key = session_key(file_path)
+    total = os.path.getsize(file_path)
+    session_uri = load_sessions().get(key)
+
+    if session_uri:
+        print("Resuming interrupted upload...")
+        try:
+            received, response = query_progress(request, session_uri, total)
+        except HttpError as e:
+            if e.resp.status not in (404, 410):
+                raise
+            print("⚠ Saved upload session expired, starting over")
+            forget_session(key)
+        else:
+            if response is not None:
+                forget_session(key)
+                return response
+            request.resumable_uri = session_uri
+            request.resumable_progress = received
+            print(f"Server already has {received / (1024 * 1024):.1f} MB")
+
+    def on_session(uri):
+        save_session(key, uri)
+
+    http = SessionRecorder(request.http, request.uri, on_session)
+    response = None
+    chunk = 0
+    retries = 0
+
+    while response is None:
+        sent_before = request.resumable_progress
+        started = time.monotonic()
+
+        try:
+            status, response = request.next_chunk(http=http, num_retries=MAX_RETRIES)
+        except RETRIABLE_EXCEPTIONS as error:
+            # next_chunk asks the server for the confirmed byte count before sending more
+            retries += 1
+            if retries > MAX_RETRIES:
+                print(f"✗ Giving up after {MAX_RETRIES} retries")
+                raise
+
+            delay = min(MAX_RETRY_DELAY, 2 ** retries) * random.uniform(0.5, 1)
+            print(f"⚠ Retriable error: {error}")
+            print(f"  Retry {retries}/{MAX_RETRIES} in {delay:.1f}s...")
+            time.sleep(delay)
+            continue
+
+        retries = 0
+
+        # Throughput of this chunk
+        chunk += 1
+        sent = (total if response is not None else request.resumable_progress) - sent_before
+        elapsed = max(time.monotonic() - started, 1e-6)
+        progress = 100 if response is not None else int(status.progress() * 100) if status else 0
+        print(f"Chunk {chunk}: {sent / (1024 * 1024):.1f} MB in {elapsed:.1f}s "
+              f"({sent / (1024 * 1024) / elapsed:.2f} MB/s) - {progress}%")
+
+    forget_session(key)
+    return response
+
+
+class SessionRecorder:
+    """Http wrapper passed to next_chunk: reports the session URI as soon as the server creates it"""
+
+    def __init__(self, http, upload_uri, on_session):
+        self.http = http
+        self.upload_uri = upload_uri
+        self.on_session = on_session
+
+    def request(self, uri, method='GET', *args, **kwargs):
+        resp, content = self.http.request(uri, method, *args, **kwargs)
+        # The session-creation request goes to the upload URI; its Location is the session URI
+        if uri == self.upload_uri and resp.status == 200 and 'location' in resp:
+            self.on_session(resp['location'])
+        return resp, content
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+def query_progress(request, session_uri, total):
+    """Ask the server how much of a resumable upload it has received
+
+    Returns:
+        (bytes received, None), or (total, API response) if the upload already finished
+
+    Raises:
+        HttpError: If the session is unknown (404/410) or the check fails
+    """
+    resp, content = request.http.request(
+        session_uri, 'PUT',
+        headers={'Content-Length': '0', 'Content-Range': f'bytes */{total}'}
+    )
+    if resp.status in (200, 201):
+        return total, request.postproc(resp, content)
+    if resp.status == 308:
+        # Range: bytes=0-<last byte received>; absent when nothing was received
+        received = int(resp['range'].split('-')[1]) + 1 if 'range' in resp else 0
+        return received, None
+    raise HttpError(resp, content, uri=session_uri)
+
+
+def session_key(file_path):
+    """Identify a file by path, size and modification time"""
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def load_sessions():
+    """Load the saved upload sessions"""
+    if not os.path.exists(SESSIONS_FILE):
+        return {}
+    try:
+        with open(SESSIONS_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read {SESSIONS_FILE}: {e}")
+        return {}
+
+
+def save_session(key, session_uri):
+    """Save the session URI of an unfinished upload"""
+    with sessions_lock():
+        sessions = load_sessions()
+        sessions[key] = session_uri
+        write_sessions(sessions)
+
+
+def forget_session(key):
+    """Remove the session of a finished (or expired) upload"""
+    with sessions_lock():
+        sessions = load_sessions()
+        if sessions.pop(key, None) is not None:
+            write_sessions(sessions)
+
+
+@contextmanager
+def sessions_lock():
+    """Hold the sessions lock of this process and the flock shared with other processes"""
+    with _sessions_lock, open(SESSIONS_LOCK_FILE, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_sessions(sessions):
+    """Write the sessions file atomically (caller holds sessions_lock)"""
+    fd, tmp_path = tempfile.mkstemp(prefix='.upload_sessions-', dir=str(SCRIPT_DIR))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(sessions, f, indent=2)
+    os.replace(tmp_path, SESSIONS_FILE)
@@ -0,0 +1,158 @@
+"""
+YouTube Quota
+Local ledger of YouTube Data API quota units spent per day, so uploads that
+would exceed the daily quota are held (or refused) before any bytes are sent.
+The quota resets at midnight Pacific time
+"""
+
+import os
+import json
+import time
+import fcntl
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Get the directory where this script is located
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+LEDGER_FILE = str(SCRIPT_DIR / 'quota_ledger.json')
+LEDGER_LOCK_FILE = LEDGER_FILE + '.lock'
+
+# Daily quota of the Google Cloud project
+DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+
+# Units charged per API call (videos.insert is charged even when the upload fails)
+QUOTA_COSTS = {
+    'videos.insert': int(os.getenv("YOUTUBE_INSERT_COST", "1600")),
+    'thumbnails.set': 50,
+}
+
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+# Serializes ledger updates between threads; the flock on LEDGER_LOCK_FILE
+# serializes them between processes (main.py and batch_publisher.py share the ledger)
+_lock = threading.Lock()
+
+
+def reserve(methods):
+    """Reserve the units of the given API calls in today's budget
+
+    Args:
+        methods: API methods about to be called, e.g. ['videos.insert', 'thumbnails.set']
+
+    Returns:
+        True if the calls fit today's remaining quota (the units are then counted as spent)
+    """
+    units = quota_cost(methods)
+    with ledger_lock():
+        ledger = load_ledger()
+        if ledger['used'] + units > DAILY_QUOTA:
+            return False
+        ledger['used'] += units
+        for method in methods:
+            ledger['calls'][method] = ledger['calls'].get(method, 0) + 1
+        save_ledger(ledger)
+        return True
+
+
+def release(methods):
+    """Give back units reserved for calls that were not made"""
+    units = quota_cost(methods)
+    with ledger_lock():
+        ledger = load_ledger()
+        ledger['used'] = max(0, ledger['used'] - units)
+        for method in methods:
+            ledger['calls'][method] = max(0, ledger['calls'].get(method, 0) - 1)
+        save_ledger(ledger)
+
+
+def mark_exhausted():
+    """Record that the API reported the quota as exceeded (e.g. spent by another client of the project)"""
+    with ledger_lock():
+        ledger = load_ledger()
+        ledger['used'] = DAILY_QUOTA
+        save_ledger(ledger)
+
+
+def remaining():
+    """Units left in today's quota"""
+    with ledger_lock():
+        return max(0, DAILY_QUOTA - load_ledger()['used'])
+
+
+def wait_for_quota(methods):
+    """Reserve quota for the given calls, holding until the next quota day if today's budget is spent
+
+    Returns:
+        True once reserved, False if the calls can never fit in a day's quota
+    """
+    if quota_cost(methods) > DAILY_QUOTA:
+        print(f"✗ {', '.join(methods)} costs {quota_cost(methods)} units, more than the daily quota ({DAILY_QUOTA})")
+        return False
+
+    while not reserve(methods):
+        reset_at = next_reset()
+        # Via timestamps: subtracting two datetimes in the same zone ignores a DST change in between
+        wait = max(1, reset_at.timestamp() - time.time())
+        print(f"⏸ YouTube quota spent for today ({remaining()} units left, {quota_cost(methods)} needed)")
+        print(f"  Holding upload until the quota resets at {reset_at:%Y-%m-%d %H:%M %Z} ({wait / 3600:.1f}h)")
+        time.sleep(wait)
+
+    return True
+
+
+def quota_cost(methods):
+    """Total units of the given API calls"""
+    return sum(QUOTA_COSTS[method] for method in methods)
+
+
+def next_reset():
+    """Start of the next quota day, plus a minute of margin"""
+    tomorrow = datetime.now(PACIFIC).date() + timedelta(days=1)
+    return datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 1, tzinfo=PACIFIC)
+
+
+"""
+PRIVATE METHODS
+"""
+
+def quota_day():
+    """The current quota day (quota resets at midnight Pacific time)"""
+    return datetime.now(PACIFIC).date().isoformat()
+
+
+@contextmanager
+def ledger_lock():
+    """Hold the ledger lock of this process and the flock shared with other processes"""
+    with _lock, open(LEDGER_LOCK_FILE, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def load_ledger():
+    """Load today's ledger; a ledger from an earlier day starts over (caller holds ledger_lock)"""
+    today = quota_day()
+    if os.path.exists(LEDGER_FILE):
+        try:
+            with open(LEDGER_FILE, 'r') as f:
+                ledger = json.load(f)
+            if ledger.get('day') == today:
+                return ledger
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read {LEDGER_FILE}: {e}")
+    return {'day': today, 'used': 0, 'calls': {}}
+
+
+def save_ledger(ledger):
+    """Write the ledger atomically (caller holds ledger_lock)"""
+    fd, tmp_path = tempfile.mkstemp(prefix='.quota_ledger-', dir=str(SCRIPT_DIR))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(ledger, f, indent=2)
+    os.replace(tmp_path, LEDGER_FILE)
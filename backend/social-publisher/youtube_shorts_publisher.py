@@ -1,12 +1,18 @@
 import os
 import sys
 import pickle
+import threading
 from pathlib import Path
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import HttpRequest, MediaFileUpload
 from googleapiclient.errors import HttpError
+from resumable_upload import UPLOAD_CHUNK_SIZE, execute_resumable
+from media_preflight import check_video, fix_video
+import youtube_quota
 
 # Get the directory where this script is located
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -19,12 +25,80 @@ CLIENT_SECRETS_FILE = str(SCRIPT_DIR / 'client_secrets.json')
 TOKEN_FILE = str(SCRIPT_DIR / 'token.pickle')
 VIDEOS_FOLDER = 'videos'
 
+# Credentials and service object shared by all uploaders of the process (see authenticate)
+_credentials = None
+_service = None
+_service_lock = threading.Lock()
+
+# Each thread sends its requests over its own connection (httplib2 is not thread-safe)
+_thread_http = threading.local()
+
+
+def build_request(http, *args, **kwargs):
+    """requestBuilder for the shared service: bind each request to the calling thread's connection"""
+    return HttpRequest(thread_http(), *args, **kwargs)
+
+
+def thread_http():
+    """Authorized keep-alive connection of the calling thread"""
+    http = getattr(_thread_http, 'http', None)
+    if http is None:
+        http = _thread_http.http = AuthorizedHttp(_credentials, http=httplib2.Http())
+    return http
+
+
+def save_credentials(credentials):
+    """Save credentials for next time"""
+    with open(TOKEN_FILE, 'wb') as token:
+        pickle.dump(credentials, token)
+
+
+def refresh_if_expiring():
+    """Refresh the shared access token only if it is expired or about to expire"""
+    with _service_lock:
+        # valid turns False shortly before the token actually expires
+        if _credentials is None or _credentials.valid:
+            return True
+        try:
+            print("Refreshing access token...")
+            _credentials.refresh(Request())
+            save_credentials(_credentials)
+            return True
+        except Exception as e:
+            print(f"✗ Token refresh failed: {e}")
+            return False
+
+
+def quota_exceeded(error):
+    """Whether an HttpError is the API rejecting a call because the daily quota is spent"""
+    return error.resp.status == 403 and b'quotaExceeded' in (error.content or b'')
+
+
 class YouTubeShortsUploader:
-    def __init__(self):
+    def __init__(self, wait_for_quota=False):
+        """
+        Args:
+            wait_for_quota: Hold uploads until the quota resets when today's quota
+                is spent, instead of failing them
+        """
         self.youtube = None
+        self.wait_for_quota = wait_for_quota
         
     def authenticate(self):
-        """Authenticate with YouTube using OAuth 2.0"""
+        """Authenticate with YouTube using OAuth 2.0
+
+        Credentials are loaded and the service object is built once per
+        process (from the discovery document bundled with the client library),
+        then shared by every uploader.
+        """
+        global _credentials, _service
+
+        with _service_lock:
+            service = _service
+        if service is not None:
+            self.youtube = service
+            return refresh_if_expiring()
+
         print("Authenticating with YouTube...")
         
         credentials = None
@@ -70,12 +144,20 @@ class YouTubeShortsUploader:
                     return False
             
             # Save credentials for next time
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(credentials, token)
+            save_credentials(credentials)
             print("✓ Credentials saved for future use")
         
-        # Build YouTube service
-        self.youtube = build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
+        # Build YouTube service (static discovery: no discovery document is fetched)
+        with _service_lock:
+            if _service is None:
+                _credentials = credentials
+                _service = build(
+                    API_SERVICE_NAME, API_VERSION,
+                    http=AuthorizedHttp(credentials, http=httplib2.Http()),
+                    requestBuilder=build_request,
+                    static_discovery=True
+                )
+            self.youtube = _service
         print("✓ Successfully authenticated with YouTube\n")
         return True
     
@@ -107,11 +189,29 @@ class YouTubeShortsUploader:
         
         print(f"✓ File size: {file_size_mb:.2f} MB ({file_size_gb:.3f} GB)")
         print(f"✓ Format: {file_ext}")
+        
+        # Check the streams against the platform specs (ffprobe)
+        if not check_video(video_path, 'youtube'):
+            return False
+        
         print("✓ Video validation passed\n")
         return True
     
 
-    def upload_thumbnail(self, video_id, thumbnail_path):
+    def reserve_quota(self, methods):
+        """Reserve today's quota for the given API calls, holding or failing when it is spent"""
+        if self.wait_for_quota:
+            return youtube_quota.wait_for_quota(methods)
+
+        if youtube_quota.reserve(methods):
+            return True
+
+        print(f"✗ Not enough YouTube quota left today: {youtube_quota.remaining()} units left, "
+              f"{youtube_quota.quota_cost(methods)} needed")
+        print(f"  The quota resets at {youtube_quota.next_reset():%Y-%m-%d %H:%M %Z}")
+        return False
+
+    def upload_thumbnail(self, video_id, thumbnail_path, quota_reserved=False):
         """Upload custom thumbnail for video"""
         try:
             print(f"\nUploading thumbnail: {thumbnail_path}")
@@ -119,12 +219,16 @@ class YouTubeShortsUploader:
             # Validate thumbnail exists
             if not os.path.exists(thumbnail_path):
                 print(f"✗ Thumbnail file not found: {thumbnail_path}")
+                if quota_reserved:
+                    youtube_quota.release(['thumbnails.set'])
                 return False
             
             # Check file size (max 2MB)
             file_size_mb = os.path.getsize(thumbnail_path) / (1024 * 1024)
             if file_size_mb > 2:
                 print(f"✗ Thumbnail too large: {file_size_mb:.2f} MB (max 2 MB)")
+                if quota_reserved:
+                    youtube_quota.release(['thumbnails.set'])
                 return False
             
             # Check file extension
@@ -133,6 +237,11 @@ class YouTubeShortsUploader:
             if file_ext not in valid_extensions:
                 print(f"✗ Invalid thumbnail format: {file_ext}")
                 print(f"Valid formats: {', '.join(valid_extensions)}")
+                if quota_reserved:
+                    youtube_quota.release(['thumbnails.set'])
+                return False
+
+            if not quota_reserved and not self.reserve_quota(['thumbnails.set']):
                 return False
             
             # Upload thumbnail
@@ -147,21 +256,36 @@ class YouTubeShortsUploader:
             
         except HttpError as e:
             print(f"✗ Thumbnail upload failed: {e}")
+            if quota_exceeded(e):
+                youtube_quota.mark_exhausted()
             return False
         except Exception as e:
             print(f"✗ Unexpected error uploading thumbnail: {e}")
             return False
 
 
-    def upload_video(self, video_path, title, description="", category="22", thumbnail_path=None):
-        """Upload video to YouTube as a Short"""
+    def upload_video(self, video_path, title, description="", category="22", thumbnail_path=None,
+                     fix_media=False):
+        """Upload video to YouTube as a Short (fix_media transcodes a video that breaks the Shorts specs)"""
         print("="*60)
         print("UPLOADING TO YOUTUBE")
         print("="*60 + "\n")
 
         # Validate video
+        if fix_media and os.path.exists(video_path):
+            video_path = fix_video(video_path, 'youtube')
         if not self.validate_video(video_path):
             return None
+
+        # Long batches can outlive the access token
+        if not refresh_if_expiring():
+            return None
+
+        # Reserve the quota of every call up front, so an upload is never sent
+        # when its calls cannot all succeed today
+        methods = ['videos.insert'] + (['thumbnails.set'] if thumbnail_path else [])
+        if not self.reserve_quota(methods):
+            return None
         
         # Prepare video metadata
         body = {
@@ -179,7 +303,7 @@ class YouTubeShortsUploader:
         # Create MediaFileUpload object
         media = MediaFileUpload(
             video_path,
-            chunksize=-1,  # Upload in a single request
+            chunksize=UPLOAD_CHUNK_SIZE,  # Upload in chunks, so a failure only resends one chunk
             resumable=True
         )
         
@@ -199,14 +323,8 @@ class YouTubeShortsUploader:
                 media_body=media
             )
             
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    progress = int(status.progress() * 100)
-                    print(f"Upload progress: {progress}%", end='\r')
-            
-            print("\n")  # New line after progress
+            response = execute_resumable(request, video_path)
+            print()
             
             # Extract video info
             video_id = response['id']
@@ -225,15 +343,21 @@ class YouTubeShortsUploader:
 
             # Upload thumbnail if provided
             if thumbnail_path:
-                self.upload_thumbnail(video_id, thumbnail_path)
+                self.upload_thumbnail(video_id, thumbnail_path, quota_reserved=True)
             
             return response
             
         except HttpError as e:
             print(f"\n✗ Upload failed: {e}")
-            if e.resp.status == 403:
+            if thumbnail_path:
+                youtube_quota.release(['thumbnails.set'])
+            if quota_exceeded(e):
+                # Quota was spent outside this ledger (e.g. by another client of the project)
+                youtube_quota.mark_exhausted()
+                print(f"\n✗ YouTube API quota exceeded; it resets at {youtube_quota.next_reset():%Y-%m-%d %H:%M %Z}")
+            elif e.resp.status == 403:
                 print("\nPossible reasons:")
-                print("- API quota exceeded (10,000 units/day)")
+                print(f"- API quota exceeded ({youtube_quota.DAILY_QUOTA:,} units/day)")
                 print("- YouTube Data API not enabled")
                 print("- Invalid OAuth credentials")
             elif e.resp.status == 400:
@@ -244,4 +368,6 @@ class YouTubeShortsUploader:
             return None
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
+            if thumbnail_path:
+                youtube_quota.release(['thumbnails.set'])
             return None
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make backend_app and the social-publisher scripts importable when pytest is run from the backend directory
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'social-publisher'))
@@ -0,0 +1,55 @@
+import threading
+from types import SimpleNamespace
+
+import batch_publisher
+from batch_publisher import PublishState, publish_batch
+
+
+class QuotaHeldYouTube:
+    """YouTube uploader whose uploads wait (like a spent daily quota) until released"""
+
+    def __init__(self, released):
+        self.released = released
+
+    def upload_video(self, **kwargs):
+        self.released.wait(timeout=10)
+        return {'id': 'yt'}
+
+
+class InstantInstagram:
+    def upload_reel(self, **kwargs):
+        return SimpleNamespace(id=1, code='ig')
+
+
+def make_item(name, platforms):
+    return {'key': name, 'name': name, 'platforms': platforms, 'video': f'{name}.mp4',
+            'title': name, 'caption': '', 'thumbnail': None}
+
+
+def test_instagram_finishes_while_youtube_is_quota_blocked(tmp_path, monkeypatch):
+    released = threading.Event()
+    monkeypatch.setattr(batch_publisher, 'report_quota', lambda items: None)
+    monkeypatch.setattr(batch_publisher.UploaderPool, 'create', lambda pool: (
+        QuotaHeldYouTube(released) if pool.platform == 'youtube' else InstantInstagram()))
+
+    items = [make_item(f'yt{i}', ['youtube']) for i in range(2)]
+    items += [make_item(f'ig{i}', ['instagram']) for i in range(3)]
+    state = PublishState(str(tmp_path / 'state.json'))
+
+    results = {}
+    batch = threading.Thread(target=lambda: results.update(
+        publish_batch(items, state, workers=2, limits={'youtube': 1, 'instagram': 1})))
+    batch.start()
+    try:
+        # Every Instagram upload is published while both YouTube uploads are still held
+        for _ in range(100):
+            if all(state.is_published(f'ig{i}', 'instagram') for i in range(3)):
+                break
+            batch.join(timeout=0.05)
+        assert all(state.is_published(f'ig{i}', 'instagram') for i in range(3))
+        assert not state.is_published('yt0', 'youtube')
+    finally:
+        released.set()
+        batch.join(timeout=10)
+
+    assert all(results.values()) and len(results) == 5
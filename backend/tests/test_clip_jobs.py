@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend_app import clip_job_store, clip_jobs
+
+
+class RecordingPipeline:
+    """Stands in for the clip pipeline: records submitted (stage, job ID) pairs"""
+
+    def __init__(self, expected=0):
+        self.submitted = []
+        self.done = threading.Event()
+        self.expected = expected
+
+    def submit(self, stage, job_id):
+        self.submitted.append((stage, job_id))
+        if len(self.submitted) >= self.expected:
+            self.done.set()
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(clip_job_store, 'CLIP_JOB_DB', str(tmp_path / 'clip_jobs.db'))
+    monkeypatch.setattr(clip_job_store, '_initialized', False)
+    recording = RecordingPipeline()
+    monkeypatch.setattr(clip_jobs, 'get_pipeline', lambda: recording)
+    return recording
+
+
+def test_same_clip_in_flight_joins_the_existing_job(pipeline):
+    first = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+    # Same range written differently: start/end are normalized before keying
+    second = clip_jobs.submit_clip_job("Other title", "abc", "00:01:05", "00:02:00")
+
+    assert second["id"] == first["id"]
+    assert pipeline.submitted == [(clip_jobs.DOWNLOAD, first["id"])]
+
+
+def test_different_ranges_are_separate_jobs(pipeline):
+    first = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+    second = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:01")
+
+    assert second["id"] != first["id"]
+    assert len(pipeline.submitted) == 2
+
+
+def test_produced_clip_reuses_its_asset_without_running(pipeline):
+    cache_key = clip_jobs.clip_cache_key("abc", "1:05", "2:00")
+    clip_job_store.put_clip_asset(cache_key, "abc", "f" * 64, "ASSET1", clip_jobs.utc_now())
+
+    job = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+
+    assert job["status"] == clip_jobs.SUCCEEDED
+    assert job["canva_asset_id"] == "ASSET1"
+    assert pipeline.submitted == []
+
+
+def test_failed_job_does_not_block_a_retry(pipeline):
+    first = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+    clip_jobs.fail_job(first["id"], RuntimeError("download failed"))
+
+    retry = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+
+    assert retry["id"] != first["id"]
+    assert retry["status"] == clip_jobs.QUEUED
+
+
+def test_simultaneous_submit_returns_the_winning_job(pipeline, monkeypatch):
+    winner = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+
+    # The losing request checked for an in-flight job before the winner inserted its row
+    real_find = clip_job_store.find_active_job
+    calls = []
+    def find_after_race(cache_key):
+        calls.append(cache_key)
+        return None if len(calls) == 1 else real_find(cache_key)
+    monkeypatch.setattr(clip_job_store, 'find_active_job', find_after_race)
+
+    loser = clip_jobs.submit_clip_job("Clip", "abc", "1:05", "2:00")
+
+    assert loser["id"] == winner["id"]
+    assert len(pipeline.submitted) == 1
+
+
+def test_active_cache_key_is_unique_in_the_store(pipeline):
+    job = clip_jobs.new_job("Clip", "abc", "1:05", "2:00", "key", clip_jobs.utc_now())
+    clip_job_store.insert_job(job)
+
+    duplicate = clip_jobs.new_job("Clip", "abc", "1:05", "2:00", "key", clip_jobs.utc_now())
+    with pytest.raises(sqlite3.IntegrityError):
+        clip_job_store.insert_job(duplicate)
+
+
+def test_resume_continues_each_job_from_its_checkpoint(pipeline, tmp_path):
+    downloaded = tmp_path / "clip.mp4"
+    downloaded.write_bytes(b"video")
+
+    def insert(status, cache_key, **checkpoints):
+        job = clip_jobs.new_job("Clip", "abc", "1:05", "2:00", cache_key, clip_jobs.utc_now(),
+                                status=status, **checkpoints)
+        clip_job_store.insert_job(job)
+        return job["id"]
+
+    polling = insert(clip_jobs.RUNNING, "k1", video_path=str(downloaded), upload_job_id="UPLOAD1")
+    uploading = insert(clip_jobs.RUNNING, "k2", video_path=str(downloaded))
+    # The downloaded file is gone (e.g. content/ was cleaned): download again
+    lost_file = insert(clip_jobs.RUNNING, "k3", video_path=str(tmp_path / "missing.mp4"))
+    queued = insert(clip_jobs.QUEUED, "k4")
+    insert(clip_jobs.SUCCEEDED, "k5", canva_asset_id="ASSET1")
+    insert(clip_jobs.FAILED, "k6")
+
+    pipeline.expected = 4
+    assert clip_jobs.resume_clip_jobs() == 4
+    assert pipeline.done.wait(timeout=5)
+
+    assert sorted(pipeline.submitted) == sorted([
+        (clip_jobs.POLL, polling),
+        (clip_jobs.UPLOAD, uploading),
+        (clip_jobs.DOWNLOAD, lost_file),
+        (clip_jobs.DOWNLOAD, queued),
+    ])
+
+
+def test_resume_does_not_wait_for_full_stage_queues(pipeline, monkeypatch):
+    clip_job_store.insert_job(clip_jobs.new_job("Clip", "abc", "1:05", "2:00", "k1", clip_jobs.utc_now()))
+
+    # A full stage queue blocks submit; resume_clip_jobs must still return right away
+    release = threading.Event()
+    monkeypatch.setattr(pipeline, 'submit', lambda stage, job_id: release.wait(timeout=5))
+
+    assert clip_jobs.resume_clip_jobs() == 1
+    release.set()
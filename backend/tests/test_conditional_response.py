@@ -0,0 +1,51 @@
+import gzip
+
+from flask import Flask, jsonify
+
+from backend_app.conditional_response import conditional
+
+BIG = {"items": ["x" * 100] * 50}
+
+
+def make_client():
+    app = Flask(__name__)
+
+    @app.route('/data')
+    @conditional
+    def data():
+        return jsonify(BIG)
+
+    @app.route('/missing')
+    @conditional
+    def missing():
+        return jsonify({"error": "not found"}), 404
+
+    return app.test_client()
+
+
+def test_matching_etag_is_not_modified():
+    client = make_client()
+    first = client.get('/data')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    second = client.get('/data', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+
+
+def test_etag_is_the_same_with_and_without_compression():
+    client = make_client()
+    plain = client.get('/data')
+    compressed = client.get('/data', headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+def test_errors_are_not_tagged():
+    response = make_client().get('/missing')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
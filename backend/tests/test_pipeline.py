@@ -0,0 +1,51 @@
+import threading
+
+from backend_app.pipeline import Pipeline
+
+
+def test_worker_survives_failing_error_handler():
+    done = []
+    finished = threading.Event()
+
+    def on_error(item, error):
+        raise RuntimeError("store unavailable")
+
+    def handle(item):
+        if item.startswith('bad'):
+            raise ValueError(item)
+        done.append(item)
+        if len(done) == 2:
+            finished.set()
+
+    pipeline = Pipeline(on_error)
+    pipeline.add_stage('work', handle, workers=1)
+    pipeline.start()
+
+    # The single worker must keep going after on_error raised for every bad item
+    for item in ('bad-1', 'good-1', 'bad-2', 'good-2'):
+        pipeline.submit('work', item)
+
+    assert finished.wait(timeout=5)
+    assert done == ['good-1', 'good-2']
+
+
+def test_items_move_through_stages():
+    finished = threading.Event()
+    seen = []
+
+    def first(item):
+        seen.append(('first', item))
+        return 'second'
+
+    def second(item):
+        seen.append(('second', item))
+        finished.set()
+
+    pipeline = Pipeline(lambda item, error: None)
+    pipeline.add_stage('first', first, workers=1)
+    pipeline.add_stage('second', second, workers=1, queue_size=1)
+    pipeline.start()
+    pipeline.submit('first', 'job')
+
+    assert finished.wait(timeout=5)
+    assert seen == [('first', 'job'), ('second', 'job')]
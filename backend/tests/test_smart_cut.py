@@ -0,0 +1,49 @@
+from backend_app.smart_cut import plan_pieces
+
+# Keyframes every 2 seconds
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+
+
+def test_start_and_end_inside_gops():
+    assert plan_pieces(KEYFRAMES, 1.5, 8.5) == [
+        ("encode", 1.5, 2.0),
+        ("copy", 2.0, 8.0),
+        ("encode", 8.0, 8.5),
+    ]
+
+
+def test_start_on_keyframe_has_no_head():
+    assert plan_pieces(KEYFRAMES, 2.0, 7.0) == [
+        ("copy", 2.0, 6.0),
+        ("encode", 6.0, 7.0),
+    ]
+
+
+def test_end_on_keyframe_is_not_copied_past():
+    # A keyframe at the end is not part of the clip; the last GOP is re-encoded up to it
+    assert plan_pieces(KEYFRAMES, 1.0, 8.0) == [
+        ("encode", 1.0, 2.0),
+        ("copy", 2.0, 6.0),
+        ("encode", 6.0, 8.0),
+    ]
+
+
+def test_clip_inside_single_gop():
+    assert plan_pieces(KEYFRAMES, 2.5, 3.5) is None
+
+
+def test_clip_spanning_one_keyframe():
+    # One keyframe inside the range leaves no whole GOP to copy
+    assert plan_pieces(KEYFRAMES, 1.0, 3.0) is None
+
+
+def test_keyframes_outside_range_and_unsorted():
+    assert plan_pieces([10.0, 4.0, 0.0, 6.0, 2.0], 3.0, 7.0) == [
+        ("encode", 3.0, 4.0),
+        ("copy", 4.0, 6.0),
+        ("encode", 6.0, 7.0),
+    ]
+
+
+def test_no_keyframes():
+    assert plan_pieces([], 0.0, 5.0) is None
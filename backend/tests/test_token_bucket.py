@@ -0,0 +1,46 @@
+from backend_app import canva_client
+from backend_app.canva_client import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_burst_then_even_refill(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(canva_client.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(canva_client.time, 'sleep', clock.sleep)
+
+    bucket = TokenBucket(60)
+    # Half the budget goes out at once...
+    for _ in range(30):
+        bucket.acquire()
+    assert clock.slept == []
+
+    # ...the rest is spread over the minute (30 more in 60 s: one every 2 s)
+    bucket.acquire()
+    assert clock.slept == [2.0]
+
+
+def test_no_more_than_the_rate_in_a_minute(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(canva_client.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(canva_client.time, 'sleep', clock.sleep)
+
+    bucket = TokenBucket(30)
+    started = clock.now
+    for _ in range(30):
+        bucket.acquire()
+    assert clock.now - started <= 60
+
+    bucket.acquire()
+    assert clock.now - started > 60
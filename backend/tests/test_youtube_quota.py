@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import youtube_quota
+from youtube_quota import PACIFIC
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    """Point the ledger at a temporary file and let tests set the current time"""
+    ledger_file = tmp_path / 'quota_ledger.json'
+    monkeypatch.setattr(youtube_quota, 'SCRIPT_DIR', tmp_path)
+    monkeypatch.setattr(youtube_quota, 'LEDGER_FILE', str(ledger_file))
+    monkeypatch.setattr(youtube_quota, 'LEDGER_LOCK_FILE', str(ledger_file) + '.lock')
+    monkeypatch.setattr(youtube_quota, 'DAILY_QUOTA', 10000)
+    monkeypatch.setattr(youtube_quota, 'QUOTA_COSTS', {'videos.insert': 1600, 'thumbnails.set': 50})
+
+    clock = {}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock['now'].astimezone(tz)
+
+    monkeypatch.setattr(youtube_quota, 'datetime', FrozenDatetime)
+    monkeypatch.setattr(youtube_quota.time, 'time', lambda: clock['now'].timestamp())
+    return clock
+
+
+def test_ledger_starts_over_at_pacific_midnight(ledger):
+    ledger['now'] = datetime(2026, 6, 10, 23, 59, tzinfo=PACIFIC)
+    assert youtube_quota.reserve(['videos.insert'])
+    assert youtube_quota.remaining() == 8400
+
+    ledger['now'] = datetime(2026, 6, 11, 0, 1, tzinfo=PACIFIC)
+    assert youtube_quota.remaining() == 10000
+
+
+def test_utc_midnight_does_not_reset_the_ledger(ledger):
+    # 17:00 PDT is already the next day in UTC, but still the same quota day
+    ledger['now'] = datetime(2026, 6, 10, 16, 0, tzinfo=PACIFIC)
+    youtube_quota.mark_exhausted()
+
+    ledger['now'] = datetime(2026, 6, 10, 17, 30, tzinfo=PACIFIC)
+    assert ledger['now'].astimezone(timezone.utc).date().day == 11
+    assert youtube_quota.remaining() == 0
+    assert not youtube_quota.reserve(['videos.insert'])
+
+
+def test_release_gives_back_units(ledger):
+    ledger['now'] = datetime(2026, 6, 10, 12, 0, tzinfo=PACIFIC)
+    youtube_quota.reserve(['videos.insert', 'thumbnails.set'])
+    youtube_quota.release(['thumbnails.set'])
+    assert youtube_quota.remaining() == 8400
+
+
+@pytest.mark.parametrize('now, hours', [
+    # DST ends on 2026-11-01: that day has 25 hours
+    (datetime(2026, 11, 1, 0, 30, tzinfo=PACIFIC), 24.5),
+    # DST starts on 2026-03-08: that day has 23 hours
+    (datetime(2026, 3, 8, 0, 30, tzinfo=PACIFIC), 22.5),
+])
+def test_quota_wait_lasts_until_reset_across_dst(ledger, monkeypatch, now, hours):
+    ledger['now'] = now
+    youtube_quota.mark_exhausted()
+
+    slept = []
+    def sleep(seconds):
+        slept.append(seconds)
+        # In UTC: adding to a Pacific time would add wall-clock time
+        ledger['now'] = ledger['now'].astimezone(timezone.utc) + timedelta(seconds=seconds)
+    monkeypatch.setattr(youtube_quota.time, 'sleep', sleep)
+
+    assert youtube_quota.wait_for_quota(['videos.insert'])
+    # Woken once, a minute after the reset, and the units were reserved in the new day
+    assert slept == [pytest.approx(hours * 3600 + 60)]
+    assert youtube_quota.remaining() == 8400
+
+
+def test_calls_larger_than_the_daily_quota_are_refused(ledger):
+    ledger['now'] = datetime(2026, 6, 10, 12, 0, tzinfo=PACIFIC)
+    assert not youtube_quota.wait_for_quota(['videos.insert'] * 7)
@@ -16,7 +16,7 @@ import argparse
 from pathlib import Path
 
 from video_downloader import download_clip
-from canva_automation import check_tokens, upload_video
+from backend_app import check_tokens, upload_video
 
 
 def main():
@@ -92,6 +92,7 @@ def main():
     print("STEP 3: Uploading to Canva")
     print("=" * 60)
 
+    # Skipped if a byte-identical file was uploaded before (e.g. rerunning the same range)
     asset_id = upload_video(video_path)
 
     if not asset_id:
@@ -1,5 +1,5 @@
 """Video downloader module for downloading YouTube clips."""
 
-from .video_downloader import download_clip, timestamp_to_seconds
+from .video_downloader import download_clip, download_clips, timestamp_to_seconds
 
-__all__ = ['download_clip', 'timestamp_to_seconds']
+__all__ = ['download_clip', 'download_clips', 'timestamp_to_seconds']
@@ -5,16 +5,24 @@ Downloads specific time ranges from YouTube videos in 1080p.
 
 Usage:
     python video_downloader.py <url> <start_time> <end_time> [output_title]
+    python video_downloader.py <url> --batch <ranges_file> [--workers N]
 
     start_time and end_time can be in MM:SS or HH:MM:SS format
     output_title is optional - if not provided, uses the video title
+
+    In batch mode, each non-empty line of ranges_file is "start_time,end_time[,output_title]".
+    Lines starting with # are ignored.
 """
 
 import sys
+import copy
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
 from yt_dlp.utils import download_range_func
 
+CLIP_FORMAT = 'bestvideo[height<=1080]+bestaudio/best[height<=1080]/best'
+
 
 def timestamp_to_seconds(timestamp):
     """Convert MM:SS or HH:MM:SS to seconds."""
@@ -53,13 +61,7 @@ def download_clip(url, start_time, end_time, output_title=None):
         output_template = '%(title)s_clip.%(ext)s'
 
     # Configure yt-dlp
-    ydl_opts = {
-        'format': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]/best',
-        'merge_output_format': 'mp4',
-        'download_ranges': download_range_func(None, [(start_sec, end_sec)]),
-        'force_keyframes_at_cuts': True,
-        'outtmpl': output_template,
-    }
+    ydl_opts = clip_download_options(start_sec, end_sec, output_template)
 
     # Download the clip
     try:
@@ -74,6 +76,82 @@ def download_clip(url, start_time, end_time, output_title=None):
         return False
 
 
+def download_clips(url, ranges, max_workers=4):
+    """Download several (start_time, end_time, output_title) ranges of one video.
+
+    The video is extracted once and the ranges are downloaded concurrently.
+    Returns a list of per-range result dicts in the same order as ranges.
+    """
+    # Extract once, then reuse the info dict for every range
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'format': CLIP_FORMAT}) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    video_id = info.get('id', 'clip')
+
+    def download_range(index, start_time, end_time, output_title):
+        title = output_title or f"{video_id}_clip_{index + 1:02d}"
+        result = {
+            'start': start_time,
+            'end': end_time,
+            'output_path': f"{title}.mp4",
+            'success': False,
+        }
+        try:
+            start_sec = timestamp_to_seconds(start_time)
+            end_sec = timestamp_to_seconds(end_time)
+            if start_sec >= end_sec:
+                raise ValueError("Start time must be before end time")
+
+            ydl_opts = clip_download_options(start_sec, end_sec, f'{title}.%(ext)s')
+            ydl_opts.update({'quiet': True, 'noprogress': True})
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+            result['success'] = True
+            print(f"✓ [{index + 1}/{len(ranges)}] {start_time}-{end_time} -> {result['output_path']}")
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"✗ [{index + 1}/{len(ranges)}] {start_time}-{end_time} failed: {e}")
+        return result
+
+    print(f"Downloading {len(ranges)} clips ({max_workers} in parallel)")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(download_range, index, start_time, end_time, output_title)
+            for index, (start_time, end_time, output_title) in enumerate(ranges)
+        ]
+        return [future.result() for future in futures]
+
+
+def clip_download_options(start_sec, end_sec, output_template):
+    """Build the yt-dlp options for downloading one clip range."""
+    return {
+        'format': CLIP_FORMAT,
+        'merge_output_format': 'mp4',
+        'download_ranges': download_range_func(None, [(start_sec, end_sec)]),
+        'force_keyframes_at_cuts': True,
+        'outtmpl': output_template,
+    }
+
+
+def read_ranges_file(path):
+    """Read "start_time,end_time[,output_title]" lines from a ranges file."""
+    ranges = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            parts = [part.strip() for part in line.split(',', 2)]
+            if len(parts) < 2:
+                raise ValueError(f"{path}:{line_number}: expected start_time,end_time[,output_title]")
+
+            output_title = parts[2] if len(parts) == 3 and parts[2] else None
+            ranges.append((parts[0], parts[1], output_title))
+    return ranges
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Download a specific clip from a YouTube video.',
@@ -83,17 +161,34 @@ Examples:
   python video_downloader.py "https://youtube.com/watch?v=..." 1:30 3:45
   python video_downloader.py "https://youtube.com/watch?v=..." 01:30:00 01:45:30 "my_clip"
   python video_downloader.py "https://youtube.com/watch?v=..." 90 180 "output_name"
+  python video_downloader.py "https://youtube.com/watch?v=..." --batch ranges.txt --workers 4
         '''
     )
 
     parser.add_argument('url', help='YouTube video URL')
-    parser.add_argument('start_time', help='Start time (MM:SS or HH:MM:SS format)')
-    parser.add_argument('end_time', help='End time (MM:SS or HH:MM:SS format)')
+    parser.add_argument('start_time', nargs='?', help='Start time (MM:SS or HH:MM:SS format)')
+    parser.add_argument('end_time', nargs='?', help='End time (MM:SS or HH:MM:SS format)')
     parser.add_argument('output_title', nargs='?', default=None,
                         help='Optional output filename (without extension)')
+    parser.add_argument('--batch', metavar='RANGES_FILE',
+                        help='Download every start,end[,title] range listed in RANGES_FILE')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of ranges downloaded in parallel in batch mode (default: 4)')
 
     args = parser.parse_args()
 
+    if args.batch:
+        results = download_clips(args.url, read_ranges_file(args.batch), max_workers=args.workers)
+
+        failed = [result for result in results if not result['success']]
+        print(f"\nDownloaded {len(results) - len(failed)}/{len(results)} clips")
+        for result in failed:
+            print(f"  ✗ {result['start']}-{result['end']}: {result['error']}")
+        sys.exit(0 if not failed else 1)
+
+    if not args.start_time or not args.end_time:
+        parser.error('start_time and end_time are required unless --batch is given')
+
     success = download_clip(args.url, args.start_time, args.end_time, args.output_title)
     sys.exit(0 if success else 1)
 
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { useSelector, useDispatch } from 'react-redux';
 import { selectTranscript, selectVideoId, addClipToTask, rejectTask } from './tasksSlice';
 import { getTranscriptSegments, secondsToTime, buildYouTubeUrl, timeToSeconds } from '../../utils/timeUtils';
@@ -17,6 +17,10 @@ const TaskDetails = ({ task }) => {
   const [isCreating, setIsCreating] = useState(false);
   const [createError, setCreateError] = useState(null);
 
+  // Stop polling a clip job when the task is closed
+  const createController = useRef(null);
+  useEffect(() => () => createController.current?.abort(), []);
+
   const handleReject = () => {
     dispatch(rejectTask({ taskId: task.id }));
   };
@@ -106,7 +110,10 @@ const TaskDetails = ({ task }) => {
 
       console.log('Creating clip with payload:', payload);
 
-      const response = await podSnipsApi.createSnippet(payload);
+      createController.current = new AbortController();
+      const response = await podSnipsApi.createSnippet(payload, {
+        signal: createController.current.signal,
+      });
 
       console.log('✅ Clip created successfully:', response);
 
@@ -129,6 +136,7 @@ const TaskDetails = ({ task }) => {
       // Show success message
       alert(`✅ Clip created successfully: "${clipTitle}"`);
     } catch (error) {
+      if (createController.current?.signal.aborted) return;
       console.error('❌ Failed to create clip:', error);
       setCreateError(error.message || 'Failed to create clip');
     } finally {
@@ -1,4 +1,22 @@
 import api from './api';
+import { JOB_POLL_INTERVAL_MS, JOB_MAX_WAIT_MS } from '../utils/constants';
+
+// Resolves after ms, or rejects with the abort reason when signal is aborted
+const sleep = (ms, signal) => new Promise((resolve, reject) => {
+  if (signal?.aborted) {
+    reject(signal.reason);
+    return;
+  }
+  const timer = setTimeout(resolve, ms);
+  signal?.addEventListener('abort', () => {
+    clearTimeout(timer);
+    reject(signal.reason);
+  }, { once: true });
+});
+
+const timeoutError = () => new Error(
+  `Timed out after ${Math.round(JOB_MAX_WAIT_MS / 60000)} minutes waiting for the clip`
+);
 
 export const podSnipsApi = {
   // Fetch all pending projects
@@ -42,9 +60,54 @@ export const podSnipsApi = {
     return await api.get(`/projects/${projectId}/transcript`);
   },
 
-  // Create a snippet/clip
-  createSnippet: async (data) => {
-    return await api.post('/create', data);
+  // Create a snippet/clip (queues a job, then polls it until it finishes).
+  // Rejects after JOB_MAX_WAIT_MS, or when the optional signal is aborted
+  createSnippet: async (data, { signal } = {}) => {
+    const controller = new AbortController();
+    const cancel = () => controller.abort(signal.reason);
+    if (signal?.aborted) {
+      cancel();
+    }
+    signal?.addEventListener('abort', cancel, { once: true });
+
+    const startedAt = Date.now();
+    const timer = setTimeout(() => controller.abort(timeoutError()), JOB_MAX_WAIT_MS);
+
+    try {
+      const { job_id: jobId, status, canva_asset_id: canvaAssetId } = await api.post(
+        '/create', data, { signal: controller.signal }
+      );
+
+      // Same clip was already uploaded: the existing asset is returned right away
+      if (status === 'succeeded') {
+        return { id: jobId, status, canva_asset_id: canvaAssetId };
+      }
+
+      while (Date.now() - startedAt < JOB_MAX_WAIT_MS) {
+        await sleep(JOB_POLL_INTERVAL_MS, controller.signal);
+        const { job } = await podSnipsApi.fetchJob(jobId, { signal: controller.signal });
+
+        if (job.status === 'succeeded') {
+          return job;
+        }
+        if (job.status === 'failed') {
+          throw new Error(job.error || 'Failed to create clip');
+        }
+      }
+      controller.abort(timeoutError());
+      throw controller.signal.reason;
+    } catch (error) {
+      // A cancelled request rejects with a generic "canceled" error; report why it was cancelled
+      throw controller.signal.aborted ? controller.signal.reason : error;
+    } finally {
+      clearTimeout(timer);
+      signal?.removeEventListener('abort', cancel);
+    }
+  },
+
+  // Fetch status of a clip job
+  fetchJob: async (jobId, config = {}) => {
+    return await api.get(`/jobs/${jobId}`, config);
   },
 
   // Health check
@@ -1 +1,6 @@
 export const API_BASE_URL = 'http://localhost:5000/api/v1';
+
+export const JOB_POLL_INTERVAL_MS = 2000;
+
+// Give up waiting for a clip job after this long
+export const JOB_MAX_WAIT_MS = 15 * 60 * 1000;